@@ -0,0 +1,187 @@
+import argparse
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+from vtlengine import run
+from vtlengine.API import create_ast
+from vtlengine.Model import Dataset
+
+from run_manual_examples import format_structure, load_json, peak_rss_mb
+from scale_data import generate_example
+
+# Colorama initialization
+init(autoreset=True)
+
+# Default ladder of row counts, the larger scales of scale_data are opt-in
+BENCHMARK_SCALES = [10 ** 3, 10 ** 4, 10 ** 5]
+
+# Runs of each scale, the fastest one is kept
+BENCHMARK_REPEATS = 3
+
+# Growth exponents above this value are reported as super-linear
+SUPERLINEAR_EXPONENT = 1.3
+
+COMPLEXITY_MODELS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * np.log(n),
+    "O(n^2)": lambda n: n ** 2,
+}
+
+BENCHMARK_FILE = Path(__file__).parent / "benchmark_scaling.csv"
+
+
+def time_example(test_dir: Path, rows: int, seed: int = 0, repeats: int = 1) -> float:
+    # Fastest of repeats runs over the same generated datapoints
+    input_structure = format_structure(load_json(test_dir / "input.json"))
+    datapoints: Dict[str, Union[pd.DataFrame, str, Path]] = {
+        **generate_example(test_dir, rows, seed)
+    }
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(
+            script=test_dir / "transformation.vtl",
+            data_structures=input_structure,
+            datapoints=datapoints,
+            return_only_persistent=False
+        )
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def measure_run(script: str, data_structures: Dict[str, Any],
+                datapoints: Dict[str, Union[pd.DataFrame, str, Path]]) -> Dict[str, Any]:
+    # Elapsed time of one run, rows of each result dataset and the peak RSS of the process. The
+    # peak only covers this run when the process is fresh, see run_in_process
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    result = run(script=script, data_structures=data_structures, datapoints=datapoints,
+                 return_only_persistent=False)
+    seconds = time.perf_counter() - start
+    rss_after = peak_rss_mb()
+    return {
+        "seconds": seconds,
+        "output_rows": {name: len(dataset.data) for name, dataset in result.items()
+                        if isinstance(dataset, Dataset) and dataset.data is not None},
+        "peak_rss_mb": rss_after,
+        "rss_growth_mb": rss_after - rss_before if rss_after and rss_before else None,
+    }
+
+
+def parse_seconds(script: str) -> float:
+    # Time to build the AST of the script, the part of measure_run spent before loading any data
+    start = time.perf_counter()
+    create_ast(script)
+    return time.perf_counter() - start
+
+
+def run_in_process(function: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    # Runs the function in a new process, so its peak RSS is not the one of the previous runs.
+    # The function reports its own errors, a crash (e.g. killed out of memory) is returned here
+    try:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            return executor.submit(function, *args).result()
+    except BrokenProcessPool:
+        return {"error": "The benchmark process died, probably out of memory"}
+
+
+def format_optional(value: Optional[float], digits: int) -> str:
+    return f"{value:.{digits}f}" if value is not None else ""
+
+
+def fit_complexity(rows: List[int], seconds: List[float]) -> Tuple[float, str]:
+    # Returns the log-log growth exponent and the model t = c + a * f(n) with the lowest residual
+    n = np.array(rows, dtype=float)
+    t = np.array(seconds, dtype=float)
+
+    # Fixed costs dominate the smallest scales, so the exponent uses the upper half of the ladder,
+    # at least its two top rungs
+    upper = n >= np.sort(n)[-max(2, len(n) // 2)]
+    exponent = float(np.polyfit(np.log(n[upper]), np.log(t[upper]), 1)[0])
+
+    residuals = {}
+    for name, model in COMPLEXITY_MODELS.items():
+        design = np.column_stack([np.ones_like(n), model(n)])
+        coefficients = np.linalg.lstsq(design, t, rcond=None)[0]
+        if coefficients[1] < 0:
+            continue
+        residuals[name] = float(np.sum((design @ coefficients - t) ** 2))
+    best_fit = min(residuals, key=residuals.__getitem__) if residuals else ""
+    return exponent, best_fit
+
+
+def benchmark_example(test_dir: Path, rows: List[int], seed: int = 0,
+                      repeats: int = BENCHMARK_REPEATS) -> Tuple[Dict[int, float], str]:
+    seconds: Dict[int, float] = {}
+    try:
+        # Untimed run, so the one-off parser and engine warmup is not charged to the first scale
+        time_example(test_dir, rows[0], seed)
+        for row_count in rows:
+            seconds[row_count] = time_example(test_dir, row_count, seed, repeats)
+    except Exception as e:
+        return seconds, str(e).replace('\n', ' ')
+    return seconds, ""
+
+
+def main(rows: Optional[List[int]] = None, operators: Optional[List[str]] = None,
+         seed: int = 0, repeats: int = BENCHMARK_REPEATS,
+         csv_file: Path = BENCHMARK_FILE) -> None:
+    rows = sorted(rows or BENCHMARK_SCALES)
+    base_path = Path(__file__).parent / "engine_files"
+    report = []
+    superlinear: Dict[str, float] = {}
+
+    for operator_dir in sorted(base_path.iterdir()):
+        if not operator_dir.is_dir() or (operators and operator_dir.name not in operators):
+            continue
+        for test_dir in sorted(operator_dir.iterdir()):
+            seconds, error = benchmark_example(test_dir, rows, seed, repeats)
+            exponent, best_fit = (float("nan"), "")
+            if len(seconds) == len(rows) and len(rows) > 1:
+                exponent, best_fit = fit_complexity(rows, [seconds[n] for n in rows])
+            flagged = exponent > SUPERLINEAR_EXPONENT
+            if flagged:
+                superlinear[operator_dir.name] = max(exponent,
+                                                     superlinear.get(operator_dir.name, exponent))
+            report.append([operator_dir.name, test_dir.name] + [
+                f"{seconds[n]:.6f}" if n in seconds else "" for n in rows
+            ] + [f"{exponent:.3f}", best_fit, "Yes" if flagged else "", error])
+
+            color = Fore.RED if flagged else Fore.YELLOW if error else Fore.GREEN
+            print(f"{color}Operator: {operator_dir.name}, Example: {test_dir.name}, "
+                  f"Exponent: {exponent:.2f}, Fit: {best_fit}, Error: {error}")
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Operator", "Example"] + [f"{n}_rows_s" for n in rows]
+                        + ["Exponent", "Best fit", "Super-linear", "Error"])
+        writer.writerows(report)
+    print(f"\n\nBenchmark completed. Results saved in {csv_file}")
+
+    if superlinear:
+        print(f"{Fore.RED}\nSuper-linear operators (exponent > {SUPERLINEAR_EXPONENT}):")
+        for operator, exponent in sorted(superlinear.items(), key=lambda item: -item[1]):
+            print(f"{Fore.RED}  {operator}: {exponent:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the growth of each operator")
+    parser.add_argument("--rows", type=int, nargs="+", default=BENCHMARK_SCALES,
+                        help="Ladder of row counts of the generated datasets")
+    parser.add_argument("--operator", action="append", dest="operators",
+                        help="Operator folder to benchmark, can be repeated (default all)")
+    parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEATS,
+                        help="Runs of each scale, the fastest one is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    main(args.rows, operators=args.operators, seed=args.seed, repeats=args.repeat)
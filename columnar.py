@@ -0,0 +1,99 @@
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from run_manual_examples import format_structure, load_json
+
+COLUMNAR_PATH = Path(__file__).parent / ".columnar_cache"
+
+
+def columnar_dir(test_dir: Path) -> Path:
+    # Mirrors the repository layout, examples outside of it are keyed by a hash of their path
+    test_dir = test_dir.resolve()
+    try:
+        return COLUMNAR_PATH / test_dir.relative_to(Path(__file__).parent.resolve())
+    except ValueError:
+        return COLUMNAR_PATH / hashlib.sha1(str(test_dir).encode()).hexdigest()
+
+
+def source_stamp(csv_file: Path, data_structure: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stat = csv_file.stat()
+    structure = json.dumps(data_structure, sort_keys=True).encode()
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "structure": hashlib.sha256(structure).hexdigest(),
+    }
+
+
+def read_csv(csv_file: Path, data_structure: List[Dict[str, Any]]) -> pd.DataFrame:
+    # Same dtypes and null handling as the vtlengine CSV loader: every column is a pyarrow
+    # string and only the empty string is null on String components. Storing Integer/Number
+    # columns with numeric dtypes was measured slower, vtlengine casts them value by value
+    types = {comp["name"]: comp["type"] for comp in data_structure}
+    na_values = {name: [""] if data_type == "String" else ["", '""']
+                 for name, data_type in types.items()}
+    return pd.read_csv(csv_file, dtype="string[pyarrow]", keep_default_na=False,
+                       na_values=na_values, encoding="utf-8-sig")
+
+
+def load_columnar(csv_file: Path, data_structure: List[Dict[str, Any]]) -> pd.DataFrame:
+    # Reads the Parquet copy of csv_file, rebuilding it when the CSV or its structure changed
+    output_dir = columnar_dir(csv_file.parent)
+    parquet_file = output_dir / f"{csv_file.stem}.parquet"
+    stamp_file = output_dir / f"{csv_file.stem}.json"
+    stamp = source_stamp(csv_file, data_structure)
+    if parquet_file.exists() and stamp_file.exists() and load_json(stamp_file) == stamp:
+        return pd.read_parquet(parquet_file)
+
+    data = read_csv(csv_file, data_structure)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    data.to_parquet(parquet_file, index=False)
+    with stamp_file.open(mode='w', encoding='utf-8') as f:
+        json.dump(stamp, f)
+    return data
+
+
+def load_datapoints(test_dir: Path,
+                    input_structure: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    # Columnar counterpart of collect_datapoints
+    datapoints = {}
+    for ds in input_structure["datasets"]:
+        csv_file = test_dir / f"{ds['name']}.csv"
+        if not csv_file.exists():
+            continue
+        if ds["name"] in datapoints:
+            raise ValueError(f"Duplicate dataset name found in datapoints: {ds['name']}")
+        datapoints[ds["name"]] = load_columnar(csv_file, ds["DataStructure"])
+    return datapoints
+
+
+def build_example(test_dir: Path) -> None:
+    load_datapoints(test_dir, format_structure(load_json(test_dir / "input.json")))
+    if (test_dir / "output.json").exists() and (test_dir / "DS_r.csv").exists():
+        reference_structure = format_structure(load_json(test_dir / "output.json"))
+        load_columnar(test_dir / "DS_r.csv", reference_structure["datasets"][0]["DataStructure"])
+
+
+def main(base_path: Optional[Path] = None) -> None:
+    base_path = base_path or Path(__file__).parent / "engine_files"
+    # Example folders are the ones holding a transformation.vtl, at any depth
+    for script in sorted(base_path.rglob("transformation.vtl")):
+        try:
+            build_example(script.parent)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Skipping {script.parent}: {e}")
+    print(f"Columnar files saved in {COLUMNAR_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the example CSVs to typed Parquet")
+    parser.add_argument("path", type=Path, nargs="?",
+                        help="Folder with the examples (default engine_files)")
+    args = parser.parse_args()
+
+    main(args.path)
@@ -0,0 +1,151 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from vtlengine.DataTypes.TimeHandling import TimePeriodHandler
+from vtlengine.Model import Dataset
+
+# Number of differing rows reported per column (and per missing/extra side)
+MAX_REPORTED_ROWS = 5
+
+# Same tolerance as vtlengine Dataset equality for Number components
+NUMBER_RTOL = 1e-12
+
+STRING_TYPES = ["String", "Date", "TimeInterval", "Duration"]
+NUMERIC_TYPES = ["Integer", "Number"]
+
+
+def normalize_column(column: pd.Series, type_name: str) -> pd.Series:
+    # Brings result and reference values to a common representation, nulls are kept as NaN/None
+    if type_name in NUMERIC_TYPES:
+        numbers = pd.to_numeric(column, errors="coerce").astype("float64")
+        if type_name == "Integer" and (numbers.dropna() % 1 == 0).all():
+            return numbers.astype("Int64")
+        return numbers
+    if type_name in STRING_TYPES:
+        return column.astype(str).where(column.notna(), None)
+    if type_name == "TimePeriod":
+        # Parsed once per distinct value, not once per row
+        values = column.dropna().astype(str).unique()
+        canonical = {value: str(TimePeriodHandler(value)) for value in values}
+        return column.astype(object).map(canonical)
+    return column.astype(object).where(column.notna(), None)
+
+
+def structure_differences(name: str, result: Dataset, reference: Dataset) -> List[str]:
+    result_components = {comp.name: comp.to_dict() for comp in result.components.values()}
+    reference_components = {comp.name: comp.to_dict() for comp in reference.components.values()}
+    differences = []
+    missing = sorted(set(reference_components) - set(result_components))
+    if missing:
+        differences.append(f"{name}: missing components {missing}")
+    extra = sorted(set(result_components) - set(reference_components))
+    if extra:
+        differences.append(f"{name}: additional components {extra}")
+    for comp_name in sorted(set(result_components) & set(reference_components)):
+        result_comp = result_components[comp_name]
+        reference_comp = reference_components[comp_name]
+        for key in ("role", "type", "nullable"):
+            if result_comp[key] != reference_comp[key]:
+                differences.append(f"{name}: {comp_name} {key} is {result_comp[key]}, "
+                                   f"expected {reference_comp[key]}")
+    return differences
+
+
+def format_keys(rows: pd.DataFrame, identifiers: List[str]) -> str:
+    return "; ".join(
+        "(" + ", ".join(f"{identifier}={value}" for identifier, value in zip(identifiers, key))
+        + ")"
+        for key in rows[identifiers].itertuples(index=False, name=None)
+    )
+
+
+def data_differences(name: str, result: Dataset, reference: Dataset,
+                     max_rows: int = MAX_REPORTED_ROWS) -> List[str]:
+    if result.data is None or reference.data is None:
+        if result.data is None and reference.data is None:
+            return []
+        return [f"{name}: {'result' if result.data is None else 'reference'} has no data"]
+
+    identifiers = sorted(result.get_identifiers_names())
+    columns = {comp.name: comp.data_type.__name__ for comp in reference.components.values()}
+    result_data = pd.DataFrame({column: normalize_column(result.data[column], type_name)
+                                for column, type_name in columns.items()}).reset_index(drop=True)
+    reference_data = pd.DataFrame({column: normalize_column(reference.data[column], type_name)
+                                   for column, type_name in columns.items()}
+                                  ).reset_index(drop=True)
+
+    differences = []
+    for side, data in (("result", result_data), ("reference", reference_data)):
+        duplicated = data.duplicated(subset=identifiers) if identifiers else data.index > 0
+        if duplicated.any():
+            differences.append(f"{name}: {int(duplicated.sum())} duplicated identifier "
+                               f"combinations in {side}: "
+                               f"{format_keys(data[duplicated].head(max_rows), identifiers)}")
+    if differences:
+        return differences
+
+    if not identifiers:
+        merged = result_data.add_suffix("_result").join(
+            reference_data.add_suffix("_reference"), how="outer")
+        merged["_merge"] = "both"
+    else:
+        merged = result_data.merge(reference_data, on=identifiers, how="outer",
+                                   suffixes=("_result", "_reference"), indicator=True, sort=True)
+
+    for side, label in (("left_only", "additional rows in result"),
+                        ("right_only", "missing rows in result")):
+        rows = merged[merged["_merge"] == side]
+        if len(rows):
+            differences.append(f"{name}: {len(rows)} {label}: "
+                               f"{format_keys(rows.head(max_rows), identifiers)}")
+
+    matched = merged[merged["_merge"] == "both"]
+    for column, type_name in columns.items():
+        if column in identifiers:
+            continue
+        result_values = matched[f"{column}_result"]
+        reference_values = matched[f"{column}_reference"]
+        if type_name in NUMERIC_TYPES:
+            equal = np.isclose(result_values.to_numpy(dtype="float64", na_value=np.nan),
+                               reference_values.to_numpy(dtype="float64", na_value=np.nan),
+                               rtol=NUMBER_RTOL, atol=0.0, equal_nan=True)
+        else:
+            equal = ((result_values == reference_values)
+                     | (result_values.isna() & reference_values.isna())).to_numpy()
+        if equal.all():
+            continue
+        rows = matched[~equal].head(max_rows)
+        details = "; ".join(
+            f"({', '.join(f'{identifier}={row[identifier]}' for identifier in identifiers)}): "
+            f"result={row[f'{column}_result']}, reference={row[f'{column}_reference']}"
+            for _, row in rows.iterrows()
+        )
+        differences.append(f"{name}: {column} differs in {int((~equal).sum())} rows: {details}")
+    return differences
+
+
+def compare_datasets(result: Dict[str, Any], reference: Dict[str, Any],
+                     max_rows: int = MAX_REPORTED_ROWS) -> List[str]:
+    # Returns a description of each difference, an empty list if result matches reference
+    differences = []
+    missing = sorted(set(reference) - set(result))
+    if missing:
+        differences.append(f"Missing datasets {missing}")
+    extra = sorted(set(result) - set(reference))
+    if extra:
+        differences.append(f"Additional datasets {extra}")
+
+    for name in sorted(set(result) & set(reference)):
+        result_dataset = result[name]
+        reference_dataset = reference[name]
+        if not isinstance(result_dataset, Dataset) or not isinstance(reference_dataset, Dataset):
+            if result_dataset != reference_dataset:
+                differences.append(f"{name}: result {result_dataset} != "
+                                   f"reference {reference_dataset}")
+            continue
+        # Data is only compared once the structures match
+        structure = structure_differences(name, result_dataset, reference_dataset)
+        differences.extend(structure or data_differences(name, result_dataset,
+                                                         reference_dataset, max_rows))
+    return differences
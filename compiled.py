@@ -0,0 +1,53 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+from typing import Optional
+
+from vtlengine.API import create_ast
+from vtlengine.AST import Start
+
+COMPILE_FILE = Path(__file__).parent / "compile_times.csv"
+
+
+def read_script(script_file: Path) -> str:
+    with script_file.open(encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def parse_script(script: str) -> Start:
+    # The fixed cost of an example, it only depends on the script text and not on the data.
+    # vtlengine.run has no entry point taking an AST, so the run parses the script again
+    return create_ast(script)
+
+
+def main(base_path: Optional[Path] = None, csv_file: Path = COMPILE_FILE) -> None:
+    base_path = base_path or Path(__file__).parent / "engine_files"
+    report = []
+    for script_file in sorted(base_path.rglob("transformation.vtl")):
+        script = read_script(script_file)
+        start = time.perf_counter()
+        try:
+            parse_script(script)
+        except Exception as e:
+            print(f"Skipping {script_file.parent}: {str(e).replace(chr(10), ' ')}")
+            continue
+        report.append([script_file.parent.parent.name, script_file.parent.name,
+                       f"{time.perf_counter() - start:.6f}"])
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Operator", "Example", "Parse seconds"])
+        writer.writerows(report)
+    total = sum(float(row[2]) for row in report)
+    print(f"Parsed {len(report)} scripts in {total:.3f}s, times saved in {csv_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the parsing of the example scripts")
+    parser.add_argument("path", type=Path, nargs="?",
+                        help="Folder with the examples (default engine_files)")
+    parser.add_argument("--output", type=Path, default=COMPILE_FILE)
+    args = parser.parse_args()
+
+    main(args.path, args.output)
@@ -0,0 +1,158 @@
+import argparse
+import csv
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+from benchmark import format_optional, measure_run, parse_seconds, run_in_process
+from run_manual_examples import BASE_PATH, format_structure, load_json
+from scale_data import MEASURE_CARDINALITY, dataset_seed, generate_example
+
+# Colorama initialization
+init(autoreset=True)
+
+# Check datapoint/ex_1 and ex_2 share DS_1: a time period, two string codes and Me_1
+STRUCTURE_EXAMPLE = BASE_PATH / "Check datapoint" / "ex_1"
+
+# Scripts of the Check datapoint examples, after the definition of dpr1. "invalid" (ex_1)
+# returns the failing data points, "all" (ex_2) every data point once per rule
+DATAPOINT_SCRIPTS = {
+    "invalid": "DS_r := check_datapoint ( DS_1, dpr1 );",
+    "all": "DS_r := check_datapoint ( DS_1, dpr1 all );",
+}
+
+# Rule i of a ruleset is of the kind i % 3: a plain comparison, a comparison under a when
+# condition on a code, or a when condition that also compares Me_1
+RULE_KINDS = ["comparison", "when", "when compound"]
+COMPARISONS = ["<", "<=", ">", ">=", "<>"]
+ERROR_LEVELS = [1, 2, 3]
+
+DEFAULT_RULES = [10, 100]
+DEFAULT_ROWS = [10 ** 3, 10 ** 4, 10 ** 5]
+# The "all" output has rules * rows rows, larger cases are skipped
+MAX_OUTPUT_ROWS = 10 ** 7
+
+DATAPOINT_BENCHMARK_FILE = Path(__file__).parent / "benchmark_datapoints.csv"
+
+
+def datapoint_structure() -> List[Dict[str, Any]]:
+    data_structure: List[Dict[str, Any]] = format_structure(
+        load_json(STRUCTURE_EXAMPLE / "input.json"))["datasets"][0]["DataStructure"]
+    return data_structure
+
+
+def datapoint_ruleset(rules: int, codes: Dict[str, List[str]], seed: int = 0) -> str:
+    # rules rules over Id_2, Id_3 and Me_1, codes are the values of Id_2 and Id_3 in the data
+    rng = np.random.default_rng(dataset_seed(seed, "dpr1"))
+    lines = []
+    for i in range(rules):
+        kind = RULE_KINDS[i % len(RULE_KINDS)]
+        comparison, threshold = rng.choice(COMPARISONS), rng.integers(0, MEASURE_CARDINALITY)
+        rule = f"Me_1 {comparison} {threshold}"
+        if kind != "comparison":
+            identifier = str(rng.choice(list(codes)))
+            condition = f'{identifier} = "{rng.choice(codes[identifier])}"'
+            if kind == "when compound":
+                condition += f" and Me_1 > {rng.integers(0, MEASURE_CARDINALITY)}"
+            rule = f"when {condition} then {rule}"
+        lines.append(f'R{i + 1} : {rule} errorcode "E{i + 1}" '
+                     f'errorlevel {rng.choice(ERROR_LEVELS)}')
+    return ("define datapoint ruleset dpr1 ( variable Id_2, Id_3, Me_1 ) is\n"
+            + ";\n".join(lines) + "\nend datapoint ruleset;\n")
+
+
+def run_case(variant: str, rules: int, rows: int, seed: int) -> Dict[str, Any]:
+    # Generates the data and the ruleset and runs them, in the process of run_in_process
+    try:
+        data_structure = datapoint_structure()
+        data = generate_example(STRUCTURE_EXAMPLE, rows, seed)["DS_1"]
+        codes = {name: sorted(data[name].dropna().unique()) for name in ("Id_2", "Id_3")}
+        script = datapoint_ruleset(rules, codes, seed) + DATAPOINT_SCRIPTS[variant]
+        datapoints: Dict[str, Union[pd.DataFrame, str, Path]] = {"DS_1": data}
+        parsing = parse_seconds(script)
+        measurement = measure_run(script, {"datasets": [{"name": "DS_1",
+                                                         "DataStructure": data_structure}]},
+                                  datapoints)
+    except Exception as e:
+        return {"error": str(e).replace('\n', ' ')}
+    measurement["parse_seconds"] = parsing
+    return measurement
+
+
+def main(rule_counts: Optional[List[int]] = None, rows: Optional[List[int]] = None,
+         variants: Optional[List[str]] = None, max_output_rows: int = MAX_OUTPUT_ROWS,
+         seed: int = 0, csv_file: Path = DATAPOINT_BENCHMARK_FILE) -> None:
+    report = []
+    # variant -> rule evaluations per second and peak RSS of its cases
+    summaries: Dict[str, Dict[str, List[float]]] = {}
+    skipped: List[Tuple[int, int]] = []
+
+    for rules, row_count in product(sorted(rule_counts or DEFAULT_RULES),
+                                    sorted(rows or DEFAULT_ROWS)):
+        print(f"\n{rules} rules, {row_count} rows:")
+        for variant in variants or DATAPOINT_SCRIPTS:
+            if variant == "all" and rules * row_count > max_output_rows:
+                skipped.append((rules, row_count))
+                print(f"{Fore.YELLOW}  all: skipped, {rules * row_count} output rows")
+                continue
+            result = run_in_process(run_case, variant, rules, row_count, seed)
+            error = result.get("error", "")
+            if error:
+                report.append([variant, rules, row_count, "", "", "", "", "", "", error])
+                print(f"{Fore.YELLOW}  {variant}: {error}")
+                continue
+            seconds = result["seconds"]
+            output_rows = result["output_rows"]["DS_r"]
+            evaluations = rules * row_count / seconds
+            report.append([variant, rules, row_count, output_rows, f"{seconds:.6f}",
+                           f"{result['parse_seconds']:.6f}", f"{evaluations:.0f}",
+                           format_optional(result.get("peak_rss_mb"), 1),
+                           format_optional(result.get("rss_growth_mb"), 1), ""])
+
+            summary = summaries.setdefault(variant, {"evaluations": [], "peak": []})
+            summary["evaluations"].append(evaluations)
+            if result.get("peak_rss_mb") is not None:
+                summary["peak"].append(result["peak_rss_mb"])
+            print(f"{Fore.GREEN}  {variant}: {seconds:.3f}s (parsing "
+                  f"{result['parse_seconds']:.3f}s), {evaluations:,.0f} rules x rows/s, "
+                  f"{output_rows} output rows, peak RSS "
+                  f"{format_optional(result.get('peak_rss_mb'), 0)}MB")
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Output", "Rules", "Rows", "Output rows", "Seconds", "Parse seconds",
+                         "Rules x rows per second", "Peak RSS MB", "RSS growth MB", "Error"])
+        writer.writerows(report)
+    print(f"\n\nBenchmark completed. Results saved in {csv_file}")
+
+    print("\nPer output (median rules x rows per second, highest peak RSS):")
+    for variant, summary in sorted(summaries.items()):
+        peak = f"{max(summary['peak']):.0f}MB" if summary["peak"] else "-"
+        print(f"  {variant}: {np.median(summary['evaluations']):,.0f} rules x rows/s, {peak}")
+    if skipped:
+        print(f"{Fore.YELLOW}\n\"all\" skipped above {max_output_rows} output rows: "
+              + ", ".join(f"{rules} rules x {row_count} rows" for rules, row_count in skipped))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark check_datapoint over generated "
+                                                 "datapoint rulesets")
+    parser.add_argument("--rules", type=int, nargs="+", default=DEFAULT_RULES,
+                        help="Numbers of rules of the ruleset")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="Row counts of the generated DS_1")
+    parser.add_argument("--output-mode", action="append", dest="variants",
+                        choices=list(DATAPOINT_SCRIPTS),
+                        help="Output of check_datapoint to benchmark, can be repeated "
+                             "(default both)")
+    parser.add_argument("--max-output-rows", type=int, default=MAX_OUTPUT_ROWS,
+                        help="Largest \"all\" output (rules x rows) to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DATAPOINT_BENCHMARK_FILE)
+    args = parser.parse_args()
+
+    main(args.rules, args.rows, args.variants, args.max_output_rows, args.seed, args.output)
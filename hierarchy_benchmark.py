@@ -0,0 +1,175 @@
+import argparse
+import csv
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+from benchmark import measure_run, parse_seconds
+from run_manual_examples import BASE_PATH, format_structure, load_json
+from scale_data import MEASURE_CARDINALITY, NULL_RATIO, dataset_seed, type_values
+
+# Colorama initialization
+init(autoreset=True)
+
+# Id_1 is the reference period and Id_2 the code of the hierarchy. The roll-up examples also
+# have a viral attribute, which vtlengine does not load
+STRUCTURE_EXAMPLE = BASE_PATH / "Check hierarchy" / "ex_1"
+
+# Scripts of the Check hierarchy and Hierarchical roll-up examples, after the definition of HR_1
+HIERARCHY_SCRIPTS = {
+    "check_hierarchy": "DS_r := check_hierarchy ( DS_1, HR_1 rule Id_2 {mode} all );",
+    "hierarchy": "DS_r := hierarchy ( DS_1, HR_1 rule Id_2 {mode} );",
+}
+MODES = ["non_null", "non_zero", "partial_null"]
+
+# Levels below the root and children of each code, depth 3 and fan-out 10 is 111 rules over
+# 1000 leaves
+DEFAULT_DEPTHS = [2, 3]
+DEFAULT_FAN_OUTS = [5, 10]
+# Values of Id_1, every one has all the codes
+DEFAULT_PERIODS = [1, 10]
+# Share of the parent values that do not add up, so check_hierarchy reports errors
+MISMATCH_RATIO = 0.1
+
+HIERARCHY_BENCHMARK_FILE = Path(__file__).parent / "benchmark_hierarchies.csv"
+
+
+def hierarchy_levels(depth: int, fan_out: int) -> List[List[str]]:
+    # Codes of each level, from the root "T" to the leaves. The children of the code i of a
+    # level are the codes i * fan_out to (i + 1) * fan_out - 1 of the next one, e.g. T_3_12
+    levels = [["T"]]
+    for _ in range(depth):
+        levels.append([f"{parent}_{child}" for parent in levels[-1] for child in range(fan_out)])
+    return levels
+
+
+def hierarchical_ruleset(levels: List[List[str]], fan_out: int) -> str:
+    # One rule per code with children: parent = sum of its children
+    rules: List[str] = []
+    for parents, children in zip(levels, levels[1:]):
+        for i, parent in enumerate(parents):
+            addends = " + ".join(children[i * fan_out:(i + 1) * fan_out])
+            rules.append(f'R{len(rules) + 1} : {parent} = {addends} '
+                         f'errorcode "E{len(rules) + 1}" errorlevel 1')
+    return ("define hierarchical ruleset HR_1 ( variable rule Id_2 ) is\n"
+            + ";\n".join(rules) + "\nend hierarchical ruleset;\n")
+
+
+def generate_hierarchy(data_structure: List[Dict[str, Any]], levels: List[List[str]],
+                       fan_out: int, periods: int, seed: int = 0) -> pd.DataFrame:
+    # Every code in every period. The leaves are random, NULL_RATIO of them null, the parents
+    # are the sum of their children (null if any is) and MISMATCH_RATIO of them are off by one
+    rng = np.random.default_rng(dataset_seed(seed, "DS_1"))
+    values = [rng.integers(0, MEASURE_CARDINALITY, size=(periods, len(levels[-1]))).astype(float)]
+    values[0][rng.random(values[0].shape) < NULL_RATIO] = np.nan
+    for _ in levels[:-1]:
+        children = values[0]
+        parents = children.reshape(periods, -1, fan_out).sum(axis=2)
+        parents[rng.random(parents.shape) < MISMATCH_RATIO] += 1
+        values.insert(0, parents)
+    measures = np.concatenate(values, axis=1).ravel()
+
+    codes = [code for level in levels for code in level]
+    period_values = type_values(data_structure[0]["type"], periods)
+    data = pd.DataFrame({
+        "Id_1": np.repeat(period_values, len(codes)),
+        "Id_2": np.tile(np.array(codes, dtype=object), periods),
+        "Me_1": pd.Series(measures).astype("Int64"),
+    })
+    return data.iloc[rng.permutation(len(data))].reset_index(drop=True)
+
+
+def fit_scaling(cases: List[Tuple[int, int, float]]) -> Optional[Tuple[float, float]]:
+    # Exponents a and b of seconds ~ rules ** a * rows ** b, None when the cases do not vary
+    # both independently
+    logs = np.log(np.array(cases, dtype=float))
+    design = np.column_stack([logs[:, 0], logs[:, 1], np.ones(len(cases))])
+    if len(cases) < 3 or np.linalg.matrix_rank(design) < 3:
+        return None
+    coefficients = np.linalg.lstsq(design, logs[:, 2], rcond=None)[0]
+    return float(coefficients[0]), float(coefficients[1])
+
+
+def main(depths: Optional[List[int]] = None, fan_outs: Optional[List[int]] = None,
+         period_counts: Optional[List[int]] = None, modes: Optional[List[str]] = None,
+         operators: Optional[List[str]] = None, seed: int = 0,
+         csv_file: Path = HIERARCHY_BENCHMARK_FILE) -> None:
+    data_structure: List[Dict[str, Any]] = format_structure(
+        load_json(STRUCTURE_EXAMPLE / "input.json"))["datasets"][0]["DataStructure"]
+    report = []
+    # (operator, mode) -> (rules, input rows, seconds) of its cases
+    scaling: Dict[Tuple[str, str], List[Tuple[int, int, float]]] = {}
+
+    for depth, fan_out in product(depths or DEFAULT_DEPTHS, fan_outs or DEFAULT_FAN_OUTS):
+        levels = hierarchy_levels(depth, fan_out)
+        ruleset = hierarchical_ruleset(levels, fan_out)
+        rules = sum(len(level) for level in levels[:-1])
+        codes = sum(len(level) for level in levels)
+        for periods in period_counts or DEFAULT_PERIODS:
+            data = generate_hierarchy(data_structure, levels, fan_out, periods, seed)
+            print(f"\nDepth {depth}, fan-out {fan_out}: {rules} rules, {codes} codes, "
+                  f"{periods} periods, {len(data)} rows:")
+            for operator, mode in product(operators or HIERARCHY_SCRIPTS, modes or MODES):
+                script = ruleset + HIERARCHY_SCRIPTS[operator].format(mode=mode)
+                datapoints: Dict[str, Union[pd.DataFrame, str, Path]] = {"DS_1": data}
+                case = [operator, mode, depth, fan_out, rules, codes, periods, len(data)]
+                try:
+                    parsing = parse_seconds(script)
+                    result = measure_run(script, {"datasets": [{"name": "DS_1",
+                                                                "DataStructure": data_structure}]},
+                                         datapoints)
+                except Exception as e:
+                    error = str(e).replace('\n', ' ')
+                    report.append(case + ["", "", "", "", error])
+                    print(f"{Fore.YELLOW}  {operator} {mode}: {error}")
+                    continue
+                seconds = result["seconds"]
+                output_rows = result["output_rows"]["DS_r"]
+                scaling.setdefault((operator, mode), []).append((rules, len(data), seconds))
+                report.append(case + [output_rows, f"{seconds:.6f}", f"{parsing:.6f}",
+                                      f"{len(data) / seconds:.0f}", ""])
+                print(f"{Fore.GREEN}  {operator} {mode}: {seconds:.3f}s (parsing "
+                      f"{parsing:.3f}s), {len(data) / seconds:,.0f} rows/s, "
+                      f"{output_rows} output rows")
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Operator", "Mode", "Depth", "Fan-out", "Rules", "Codes", "Periods",
+                         "Input rows", "Output rows", "Seconds", "Parse seconds", "Rows per second",
+                         "Error"])
+        writer.writerows(report)
+    print(f"\n\nBenchmark completed. Results saved in {csv_file}")
+
+    print("\nScaling (seconds ~ rules ^ a * rows ^ b):")
+    for (operator, mode), cases in sorted(scaling.items()):
+        exponents = fit_scaling(cases)
+        if exponents is None:
+            print(f"  {operator} {mode}: not enough independent cases")
+            continue
+        print(f"  {operator} {mode}: a = {exponents[0]:.2f}, b = {exponents[1]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark check_hierarchy and hierarchy over "
+                                                 "generated hierarchical rulesets")
+    parser.add_argument("--depth", type=int, nargs="+", default=DEFAULT_DEPTHS,
+                        help="Levels of the hierarchy below its root")
+    parser.add_argument("--fan-out", type=int, nargs="+", default=DEFAULT_FAN_OUTS,
+                        help="Children of each code")
+    parser.add_argument("--periods", type=int, nargs="+", default=DEFAULT_PERIODS,
+                        help="Values of Id_1, each one has every code")
+    parser.add_argument("--mode", action="append", dest="modes", choices=MODES,
+                        help="Mode to benchmark, can be repeated (default all)")
+    parser.add_argument("--operator", action="append", dest="operators",
+                        choices=list(HIERARCHY_SCRIPTS),
+                        help="Operator to benchmark, can be repeated (default both)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=HIERARCHY_BENCHMARK_FILE)
+    args = parser.parse_args()
+
+    main(args.depth, args.fan_out, args.periods, args.modes, args.operators, args.seed,
+         args.output)
@@ -0,0 +1,294 @@
+import argparse
+import csv
+import re
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+from benchmark import format_optional, measure_run, run_in_process
+from manifest import script_tokens
+from run_manual_examples import BASE_PATH, format_structure, load_json
+from scale_data import build_dataset, dataset_seed
+
+# Colorama initialization
+init(autoreset=True)
+
+JOIN_PATH = BASE_PATH / "Join"
+
+# Rows of each joined dataset
+DEFAULT_ROWS = [10 ** 4, 10 ** 5, 10 ** 6]
+# Distinct values of the first identifier (Id_1), capped by the rows
+DEFAULT_CARDINALITIES = [1000]
+# Zipf exponent of the first identifier values, 0 is uniform
+DEFAULT_SKEWS = [0.0, 1.2]
+# Share of the rows of the other datasets whose identifiers are found in DS_1
+DEFAULT_MATCH_RATIOS = [1.0, 0.5]
+
+# "full": the datasets share all identifiers (one to one). "lookup": the other datasets only
+# have the first identifier, so every one of their rows matches a skewed number of DS_1 rows
+KEY_SHAPES = ["full", "lookup"]
+
+# The inputs of cross_join are reduced so its output stays under this number of rows
+MAX_OUTPUT_ROWS = 10 ** 7
+
+JOIN_KINDS = ["inner_join", "left_join", "full_join", "cross_join"]
+JOIN_CLAUSES = ["filter", "calc", "aggr", "keep", "drop", "rename", "apply"]
+
+# Share of the rows given the literal of a filter on a measure, e.g. Me_1 = "A" in ex_5. A
+# literal of an identifier can only be given once per value of the others, it goes to the rows
+# of the first occurrence of each Id_1 value
+FILTER_RATIO = 0.5
+# Equality filters on a component and a string literal, e.g. filter Id_2 ="B"
+FILTER_PATTERN = re.compile(r'filter\s+(?:\w+#)?(\w+)\s*=\s*"([^"]*)"')
+
+JOIN_BENCHMARK_FILE = Path(__file__).parent / "benchmark_joins.csv"
+
+
+def input_datasets(test_dir: Path) -> List[Dict[str, Any]]:
+    # Input structures of the example. The Join examples name all their structures DS_1, they
+    # are renamed after the datapoint files, in the same order
+    datasets: List[Dict[str, Any]] = format_structure(
+        load_json(test_dir / "input.json"))["datasets"]
+    names = sorted(csv_file.stem for csv_file in test_dir.glob("*.csv")
+                   if csv_file.name != "DS_r.csv")
+    if len({ds["name"] for ds in datasets}) < len(datasets) and len(names) == len(datasets):
+        for ds, name in zip(datasets, names):
+            ds["name"] = name
+    return datasets
+
+
+def join_label(script: str) -> str:
+    # e.g. "inner_join filter calc drop"
+    tokens = script_tokens(script)
+    kinds = [kind for kind in JOIN_KINDS if kind in tokens]
+    return " ".join(kinds[:1] + [clause for clause in JOIN_CLAUSES if clause in tokens])
+
+
+def filter_literals(script: str) -> Dict[str, str]:
+    # Component -> literal of the equality filters of the script
+    return dict(FILTER_PATTERN.findall(script))
+
+
+def inject_literals(data: pd.DataFrame, data_structure: List[Dict[str, Any]],
+                    codes: List[np.ndarray], literals: Dict[str, str],
+                    rng: np.random.Generator) -> None:
+    # Generated values never match the literals of the script, a share of the rows gets them so
+    # the filters keep a known fraction. Identifiers use their codes, every dataset then gets
+    # the literal on the same keys and the joins still match
+    identifiers = [comp["name"] for comp in data_structure if comp["role"] == "Identifier"]
+    for comp in data_structure:
+        name = comp["name"]
+        if name not in literals or comp["type"] != "String":
+            continue
+        if name in identifiers:
+            selected = codes[identifiers.index(name)] == 0
+        else:
+            selected = rng.random(len(data)) < FILTER_RATIO
+        data.loc[selected, name] = literals[name]
+
+
+def skewed_codes(rows: int, cardinality: int, skew: float,
+                 rng: np.random.Generator) -> np.ndarray:
+    # Code k is drawn with a probability proportional to (k + 1) ** -skew
+    weights = np.arange(1, cardinality + 1, dtype=float) ** -skew
+    return rng.choice(cardinality, size=rows, p=weights / weights.sum())
+
+
+def occurrence_codes(codes: np.ndarray) -> np.ndarray:
+    # Number of previous rows with the same code, makes (code, occurrence) unique
+    return pd.Series(codes).groupby(codes).cumcount().to_numpy()
+
+
+def identifier_codes(rows: int, cardinality: int, skew: float, match_ratio: float,
+                     lookup: bool, count: int,
+                     rng: np.random.Generator) -> List[List[np.ndarray]]:
+    # Codes of the two identifiers of count datasets, the first one is DS_1. The other
+    # datasets take match_ratio of their keys from DS_1, the rest are never found in it
+    first = skewed_codes(rows, cardinality, skew, rng)
+    keys = [[first, occurrence_codes(first)]]
+    for _ in range(count - 1):
+        if lookup:
+            present = np.unique(first)
+            matched = rng.choice(present, size=round(len(present) * match_ratio), replace=False)
+            unmatched = np.arange(cardinality, cardinality + len(present) - len(matched))
+            keys.append([rng.permutation(np.concatenate([matched, unmatched]))])
+            continue
+        matched_rows = rng.choice(rows, size=round(rows * match_ratio), replace=False)
+        unmatched = skewed_codes(rows - len(matched_rows), cardinality, skew, rng)
+        # Occurrences above the ones of DS_1 are not in DS_1
+        offset = int(keys[0][1].max()) + 1
+        codes = [np.concatenate([first[matched_rows], unmatched]),
+                 np.concatenate([keys[0][1][matched_rows],
+                                 occurrence_codes(unmatched) + offset])]
+        order = rng.permutation(rows)
+        keys.append([code[order] for code in codes])
+    return keys
+
+
+def generate_case(datasets: List[Dict[str, Any]], rows: int, cardinality: int, skew: float,
+                  match_ratio: float, lookup: bool, seed: int = 0,
+                  literals: Optional[Dict[str, str]] = None
+                  ) -> Tuple[Dict[str, Any], Dict[str, pd.DataFrame]]:
+    # Structures and datapoints of the joined datasets
+    for ds in datasets:
+        if sum(comp["role"] == "Identifier" for comp in ds["DataStructure"]) != 2:
+            raise ValueError(f"{ds['name']} must have two identifiers")
+    rng = np.random.default_rng(dataset_seed(seed, "Join"))
+    keys = identifier_codes(rows, cardinality, skew, match_ratio, lookup, len(datasets), rng)
+
+    structures = []
+    datapoints = {}
+    for i, (ds, codes) in enumerate(zip(datasets, keys)):
+        data_structure = ds["DataStructure"]
+        if lookup and i > 0:
+            # Only the first identifier is kept
+            second = [comp for comp in data_structure if comp["role"] == "Identifier"][1]
+            data_structure = [comp for comp in data_structure if comp is not second]
+        structures.append({"name": ds["name"], "DataStructure": data_structure})
+        datapoints[ds["name"]] = build_dataset(data_structure, codes, rng)
+        inject_literals(datapoints[ds["name"]], data_structure, codes, literals or {}, rng)
+    return {"datasets": structures}, datapoints
+
+
+def cross_join_rows(max_output_rows: int, count: int) -> int:
+    # Largest rows per dataset whose cross product of count datasets stays under the limit
+    rows = int(max_output_rows ** (1 / count))
+    while rows ** count > max_output_rows:
+        rows -= 1
+    while (rows + 1) ** count <= max_output_rows:
+        rows += 1
+    return max(rows, 1)
+
+
+def filter_kept(generated: Dict[str, pd.DataFrame], literals: Dict[str, str]) -> Optional[float]:
+    # Share of the rows of the first dataset with a filtered component that pass the filters on
+    # its components, None without filters
+    for data in generated.values():
+        filtered = [name for name in literals if name in data.columns]
+        if filtered:
+            return float(np.logical_and.reduce(
+                [data[name] == literals[name] for name in filtered]).mean())
+    return None
+
+
+def run_case(script: str, datasets: List[Dict[str, Any]], rows: int, cardinality: int,
+             skew: float, match_ratio: float, lookup: bool, seed: int) -> Dict[str, Any]:
+    try:
+        literals = filter_literals(script)
+        structures, generated = generate_case(datasets, rows, cardinality, skew, match_ratio,
+                                              lookup, seed, literals)
+        datapoints: Dict[str, Union[pd.DataFrame, str, Path]] = {**generated}
+        measurement = measure_run(script, structures, datapoints)
+    except Exception as e:
+        return {"error": str(e).replace('\n', ' ')}
+    measurement["input_rows"] = sum(len(data) for data in generated.values())
+    measurement["filter_kept"] = filter_kept(generated, literals)
+    return measurement
+
+
+def main(rows: Optional[List[int]] = None, cardinalities: Optional[List[int]] = None,
+         skews: Optional[List[float]] = None, match_ratios: Optional[List[float]] = None,
+         key_shapes: Optional[List[str]] = None, examples: Optional[List[str]] = None,
+         max_output_rows: int = MAX_OUTPUT_ROWS, seed: int = 0,
+         csv_file: Path = JOIN_BENCHMARK_FILE) -> None:
+    rows = sorted(rows or DEFAULT_ROWS)
+    cases = list(product(cardinalities or DEFAULT_CARDINALITIES, skews or DEFAULT_SKEWS,
+                         match_ratios or DEFAULT_MATCH_RATIOS))
+    report = []
+    # (join kind, key shape) -> throughputs and peak RSS of its cases
+    kinds: Dict[Tuple[str, str], Dict[str, List[float]]] = {}
+
+    for test_dir in sorted(JOIN_PATH.iterdir()):
+        if not test_dir.is_dir() or (examples and test_dir.name not in examples):
+            continue
+        script = (test_dir / "transformation.vtl").read_text(encoding="utf-8-sig")
+        label = join_label(script)
+        datasets = input_datasets(test_dir)
+        for shape in key_shapes or ["full"]:
+            if shape == "lookup" and len(datasets) < 2:
+                continue
+            # cross_join outputs the product of its inputs, the larger scales are reduced
+            # under the guard and the repeated ones skipped
+            guarded_rows = rows
+            if "cross_join" in label:
+                guard = cross_join_rows(max_output_rows, len(datasets))
+                guarded_rows = sorted({min(row_count, guard) for row_count in rows})
+                if guarded_rows != rows:
+                    print(f"{Fore.YELLOW}{label} ({test_dir.name}) limited to {guard} rows per "
+                          f"dataset, at most {max_output_rows} output rows")
+            for row_count, (cardinality, skew, match_ratio) in product(guarded_rows, cases):
+                cardinality = min(cardinality, row_count)
+                result = run_in_process(run_case, script, datasets, row_count, cardinality,
+                                        skew, match_ratio, shape == "lookup", seed)
+                error = result.get("error", "")
+                seconds = result.get("seconds")
+                throughput = result["input_rows"] / seconds if seconds else None
+                output_rows = sum(result["output_rows"].values()) if not error else None
+                report.append([
+                    test_dir.name, label, shape, row_count, cardinality, skew, match_ratio,
+                    result.get("input_rows", ""), output_rows if output_rows is not None else "",
+                    format_optional(seconds, 6), format_optional(throughput, 0),
+                    format_optional(result.get("filter_kept"), 4),
+                    format_optional(result.get("peak_rss_mb"), 1),
+                    format_optional(result.get("rss_growth_mb"), 1), error,
+                ])
+
+                case = (f"{label} ({test_dir.name}), {shape} keys, {row_count} rows, "
+                        f"cardinality {cardinality}, skew {skew}, match {match_ratio}")
+                if error:
+                    print(f"{Fore.YELLOW}{case}: {error}")
+                    continue
+                summary = kinds.setdefault((label, shape), {"throughput": [], "peak": []})
+                summary["throughput"].append(throughput or 0.0)
+                if result.get("peak_rss_mb") is not None:
+                    summary["peak"].append(result["peak_rss_mb"])
+                kept = result.get("filter_kept")
+                print(f"{Fore.GREEN}{case}: {seconds:.3f}s, {throughput:,.0f} rows/s"
+                      + (f" (filter keeps {kept:.1%})" if kept is not None else "")
+                      + f", {output_rows} output rows, peak RSS "
+                      f"{format_optional(result.get('peak_rss_mb'), 0)}MB")
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Example", "Join", "Keys", "Rows", "Cardinality", "Skew",
+                         "Match ratio", "Input rows", "Output rows", "Seconds", "Rows per second",
+                         "Filter kept", "Peak RSS MB", "RSS growth MB", "Error"])
+        writer.writerows(report)
+    print(f"\n\nBenchmark completed. Results saved in {csv_file}")
+
+    print("\nPer join kind (median input rows per second, highest peak RSS):")
+    for (label, shape), summary in sorted(kinds.items()):
+        peak = f"{max(summary['peak']):.0f}MB" if summary["peak"] else "-"
+        print(f"  {label}, {shape} keys: {np.median(summary['throughput']):,.0f} rows/s, {peak}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Join examples over generated "
+                                                 "datasets with skewed keys")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="Rows of each joined dataset")
+    parser.add_argument("--cardinality", type=int, nargs="+", default=DEFAULT_CARDINALITIES,
+                        help="Distinct values of the first identifier")
+    parser.add_argument("--skew", type=float, nargs="+", default=DEFAULT_SKEWS,
+                        help="Zipf exponent of the first identifier values, 0 is uniform")
+    parser.add_argument("--match-ratio", type=float, nargs="+", default=DEFAULT_MATCH_RATIOS,
+                        help="Share of the rows of the other datasets found in DS_1")
+    parser.add_argument("--keys", choices=KEY_SHAPES, nargs="+", default=["full"],
+                        help="full: the datasets share their identifiers, lookup: the other "
+                             "datasets only have the first one (default full)")
+    parser.add_argument("--example", action="append", dest="examples", metavar="EX_N",
+                        help="Join example to benchmark, can be repeated (default all)")
+    parser.add_argument("--max-output-rows", type=int, default=MAX_OUTPUT_ROWS,
+                        help="Output rows cross_join is allowed to produce")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=JOIN_BENCHMARK_FILE)
+    args = parser.parse_args()
+    if any(not 0 <= ratio <= 1 for ratio in args.match_ratio):
+        parser.error("--match-ratio must be between 0 and 1")
+
+    main(args.rows, args.cardinality, args.skew, args.match_ratio, args.keys, args.examples,
+         args.max_output_rows, args.seed, args.output)
@@ -0,0 +1,245 @@
+import argparse
+import fnmatch
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import vtlengine.AST.Grammar.tokens as vtl_tokens
+
+from run_manual_examples import BASE_PATH, count_rows, load_json
+
+# Bumped whenever the layout or the tokens of the entries change, older manifests are rebuilt
+MANIFEST_VERSION = 2
+
+# Clauses of the VTL grammar that vtlengine does not list among its tokens
+EXTRA_KEYWORDS = [
+    "over", "partition by", "order by", "data points", "range", "preceding", "following",
+    "current", "unbounded", "asc", "desc", "define", "end", "datapoint", "hierarchical",
+    "ruleset", "errorcode", "errorlevel", "returns", "is", "null", "single",
+]
+
+# Keywords and operator symbols of the VTL grammar, e.g. "aggr", "group by" or ":="
+VTL_KEYWORDS: Set[str] = {
+    value for name, value in vars(vtl_tokens).items()
+    if not name.startswith("_") and isinstance(value, str)
+} | set(EXTRA_KEYWORDS)
+
+COMMENT_PATTERN = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+STRING_PATTERN = re.compile(r'"[^"]*"')
+WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|:=|<-|<>|<=|>=|\|\||[-+*/=<>#]")
+
+# Selectors starting with this prefix are regular expressions searched in "Operator/ex_N"
+REGEX_PREFIX = "re:"
+
+Manifest = Dict[str, Any]
+
+
+def manifest_file(base_path: Path) -> Path:
+    # Runs over other example folders (e.g. scaled_files/<rows>) keep their manifest there
+    if base_path.resolve() == BASE_PATH.resolve():
+        return Path(__file__).parent / ".manifest.json"
+    return base_path / ".manifest.json"
+
+
+def script_tokens(script: str) -> List[str]:
+    # VTL keywords and operators used by the script, comments and string literals excluded
+    text = STRING_PATTERN.sub(" ", COMMENT_PATTERN.sub(" ", script))
+    words = WORD_PATTERN.findall(text)
+    tokens = set()
+    for i, word in enumerate(words):
+        if i + 1 < len(words) and f"{word} {words[i + 1]}" in VTL_KEYWORDS:
+            # Keywords of two words, e.g. "group by"
+            tokens.add(f"{word} {words[i + 1]}")
+        elif word in VTL_KEYWORDS:
+            tokens.add(word)
+    return sorted(tokens)
+
+
+def file_stamps(test_dir: Path) -> Dict[str, List[int]]:
+    stamps = {}
+    for file in test_dir.iterdir():
+        if file.is_file():
+            stat = file.stat()
+            stamps[file.name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def build_entry(test_dir: Path) -> Dict[str, Any]:
+    files = {
+        name: stamp + [hashlib.sha256((test_dir / name).read_bytes()).hexdigest()]
+        for name, stamp in sorted(file_stamps(test_dir).items())
+    }
+    try:
+        datasets = [ds["name"] for ds in load_json(test_dir / "input.json")["structures"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        datasets = []
+    script_file = test_dir / "transformation.vtl"
+    return {
+        "mtime_ns": test_dir.stat().st_mtime_ns,
+        "files": files,
+        "datasets": datasets,
+        "rows": count_rows(test_dir),
+        "tokens": script_tokens(script_file.read_text(encoding="utf-8-sig"))
+        if script_file.exists() else [],
+    }
+
+
+def entry_is_current(test_dir: Path, entry: Optional[Dict[str, Any]]) -> bool:
+    # Adding or removing a file changes the folder mtime, editing one changes its own stamp
+    if entry is None or test_dir.stat().st_mtime_ns != entry["mtime_ns"]:
+        return False
+    for name, (mtime_ns, size, _) in entry["files"].items():
+        try:
+            stat = (test_dir / name).stat()
+        except FileNotFoundError:
+            return False
+        if [stat.st_mtime_ns, stat.st_size] != [mtime_ns, size]:
+            return False
+    return True
+
+
+def load_manifest(base_path: Path) -> Manifest:
+    try:
+        manifest: Manifest = load_json(manifest_file(base_path))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "mtime_ns": None, "operators": {}}
+    return manifest
+
+
+def save_manifest(manifest: Manifest, base_path: Path) -> None:
+    output_file = manifest_file(base_path)
+    tmp_file = output_file.with_suffix(".tmp")
+    with tmp_file.open(mode='w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    tmp_file.replace(output_file)
+
+
+def refresh_listing(listing: Dict[str, Any], folder: Path, children: Dict[str, Any]) -> bool:
+    # Syncs children with the subfolders of folder when its mtime changed. The new children are
+    # None until they are refreshed themselves
+    mtime_ns = folder.stat().st_mtime_ns
+    if listing["mtime_ns"] == mtime_ns:
+        return False
+    names = {child.name for child in folder.iterdir() if child.is_dir()}
+    for name in set(children) - names:
+        del children[name]
+    for name in names - set(children):
+        children[name] = None
+    listing["mtime_ns"] = mtime_ns
+    return True
+
+
+def matches(selector: str, operator: str, example: Optional[str] = None) -> bool:
+    # Selectors are "Operator" or "Operator/example", both parts accept glob patterns, or a
+    # regular expression after "re:". Without example, only the operator part is checked
+    if selector.startswith(REGEX_PREFIX):
+        if example is None:
+            return True
+        return re.search(selector[len(REGEX_PREFIX):], f"{operator}/{example}") is not None
+    operator_pattern, _, example_pattern = selector.partition("/")
+    if not fnmatch.fnmatchcase(operator, operator_pattern):
+        return False
+    return example is None or not example_pattern or fnmatch.fnmatchcase(example,
+                                                                         example_pattern)
+
+
+def normalize_keyword(keyword: str) -> str:
+    # "Group  By" -> "group by"
+    return " ".join(keyword.lower().split())
+
+
+def select_examples(base_path: Path = BASE_PATH,
+                    selected_tests: Optional[Dict[str, List[str]]] = None,
+                    selectors: Optional[List[str]] = None,
+                    uses: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    # Operator -> example -> manifest entry of the selected examples, all of them without a
+    # selection. uses keeps only the examples whose script has any of the given VTL keywords.
+    # Only the selected operators and examples are checked against the filesystem, the
+    # entries that changed are rebuilt and the manifest saved
+    keywords = {normalize_keyword(keyword) for keyword in uses or []}
+    manifest = load_manifest(base_path)
+    operators = manifest["operators"]
+    changed = refresh_listing(manifest, base_path, operators)
+
+    def operator_selected(operator: str) -> bool:
+        if not selected_tests and not selectors:
+            return True
+        return bool(selected_tests and operator in selected_tests) or any(
+            matches(selector, operator) for selector in selectors or [])
+
+    def example_selected(operator: str, example: str) -> bool:
+        if not selected_tests and not selectors:
+            return True
+        return bool(selected_tests and example in selected_tests.get(operator, [])) or any(
+            matches(selector, operator, example) for selector in selectors or [])
+
+    selection: Dict[str, Dict[str, Any]] = {}
+    for operator in sorted(filter(operator_selected, operators)):
+        if operators[operator] is None:
+            operators[operator] = {"mtime_ns": None, "examples": {}}
+        examples = operators[operator]["examples"]
+        changed |= refresh_listing(operators[operator], base_path / operator, examples)
+        selection[operator] = {}
+        for example in sorted(examples):
+            if not example_selected(operator, example):
+                continue
+            test_dir = base_path / operator / example
+            if not entry_is_current(test_dir, examples[example]):
+                examples[example] = build_entry(test_dir)
+                changed = True
+            if keywords and keywords.isdisjoint(examples[example]["tokens"]):
+                continue
+            selection[operator][example] = examples[example]
+
+    if changed:
+        save_manifest(manifest, base_path)
+    return selection
+
+
+def unmatched(base_path: Path = BASE_PATH, selectors: Optional[List[str]] = None,
+              uses: Optional[List[str]] = None) -> List[str]:
+    # The selectors that select no example, then the keywords of uses that no example of the
+    # selection (all of them without selectors) has
+    missing = [selector for selector in selectors or []
+               if not any(select_examples(base_path, selectors=[selector]).values())]
+    selection = select_examples(base_path, selectors=selectors)
+    tokens = {token for examples in selection.values() for entry in examples.values()
+              for token in entry["tokens"]}
+    return missing + [keyword for keyword in uses or []
+                      if normalize_keyword(keyword) not in tokens]
+
+
+def token_index(selection: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    # VTL keyword -> "Operator/ex_N" of the examples whose script uses it
+    index: Dict[str, List[str]] = {}
+    for operator, examples in selection.items():
+        for example, entry in examples.items():
+            for token in entry["tokens"]:
+                index.setdefault(token, []).append(f"{operator}/{example}")
+    return dict(sorted(index.items()))
+
+
+def main(base_path: Path = BASE_PATH, tokens: bool = False) -> None:
+    manifest_file(base_path).unlink(missing_ok=True)
+    selection = select_examples(base_path)
+    examples = sum(len(operator_examples) for operator_examples in selection.values())
+    print(f"Manifest of {len(selection)} operators and {examples} examples saved in "
+          f"{manifest_file(base_path)}")
+    if tokens:
+        for token, token_examples in token_index(selection).items():
+            print(f"{token}: {len(token_examples)} examples")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the manifest of the examples")
+    parser.add_argument("path", type=Path, nargs="?", default=BASE_PATH,
+                        help="Folder with the examples (default engine_files)")
+    parser.add_argument("--tokens", action="store_true",
+                        help="Print the number of examples using each VTL keyword")
+    args = parser.parse_args()
+
+    main(args.path, args.tokens)
@@ -0,0 +1,163 @@
+import argparse
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from colorama import Fore, init
+
+from repeat_benchmark import (BENCHMARK_RESULTS_PATH, DEFAULT_REPEAT, DEFAULT_WARMUP,
+                              main as run_benchmark)
+from run_manual_examples import BASE_PATH, load_cache
+
+# Colorama initialization
+init(autoreset=True)
+
+# Committed timings the current ones are compared with, in the repeat_benchmark.py format
+BASELINE_FILE = Path(__file__).parent / "performance_baseline.json"
+# Results of the runs of the gate, e.g. benchmark_results/gate/vtlengine-1.9.5.json
+GATE_RESULTS_PATH = BENCHMARK_RESULTS_PATH / "gate"
+
+# Relative slowdown of the median tolerated before failing, 0.2 is 20% slower
+DEFAULT_THRESHOLD = 0.2
+# Significance level of the one-sided permutation test
+DEFAULT_ALPHA = 0.01
+PERMUTATIONS = 5000
+
+# Number of offenders printed
+DEFAULT_TOP = 10
+
+
+class Comparison(NamedTuple):
+    name: str  # "engine_files/Operator/ex_N", or the operator for the groups
+    slowdown: float  # Relative change of the median, positive is slower
+    p_value: float
+    regressed: bool
+
+
+def slower_p_value(baseline: np.ndarray, current: np.ndarray,
+                   permutations: int = PERMUTATIONS) -> float:
+    # One-sided permutation test of the current median being higher than the baseline one
+    rng = np.random.default_rng(0)
+    pooled = np.concatenate([current, baseline])
+    observed = np.median(current) - np.median(baseline)
+    shuffled = rng.permuted(np.tile(pooled, (permutations, 1)), axis=1)
+    differences = (np.median(shuffled[:, :len(current)], axis=1)
+                   - np.median(shuffled[:, len(current):], axis=1))
+    return float((np.sum(differences >= observed) + 1) / (permutations + 1))
+
+
+def compare(name: str, baseline: np.ndarray, current: np.ndarray, threshold: float,
+            alpha: float) -> Comparison:
+    slowdown = float(np.median(current) / np.median(baseline) - 1)
+    p_value = slower_p_value(baseline, current)
+    return Comparison(name, slowdown, p_value, slowdown > threshold and p_value < alpha)
+
+
+def example_samples(benchmark: Dict[str, Any], phase: str) -> Dict[str, np.ndarray]:
+    return {
+        key: np.array(entry["samples"][phase], dtype=float)
+        for key, entry in benchmark.get("examples", {}).items()
+        if entry["result"] == "Ok" and phase in entry["samples"]
+    }
+
+
+def compare_benchmarks(baseline: Dict[str, Any], current: Dict[str, Any], phase: str = "total",
+                       threshold: float = DEFAULT_THRESHOLD,
+                       alpha: float = DEFAULT_ALPHA) -> List[Comparison]:
+    # Compares every example timed in both, then every operator over its examples. The samples
+    # of a group are divided by the baseline median of their example, so fast and slow
+    # examples weigh the same
+    baseline_samples = example_samples(baseline, phase)
+    current_samples = example_samples(current, phase)
+    comparisons = []
+    groups: Dict[str, Dict[str, List[np.ndarray]]] = {}
+    for key in sorted(set(baseline_samples) & set(current_samples)):
+        comparisons.append(compare(key, baseline_samples[key], current_samples[key],
+                                   threshold, alpha))
+        scale = np.median(baseline_samples[key])
+        group = groups.setdefault(Path(key).parent.name, {"baseline": [], "current": []})
+        group["baseline"].append(baseline_samples[key] / scale)
+        group["current"].append(current_samples[key] / scale)
+
+    for operator, group in sorted(groups.items()):
+        if len(group["baseline"]) > 1:
+            comparisons.append(compare(operator, np.concatenate(group["baseline"]),
+                                       np.concatenate(group["current"]), threshold, alpha))
+    return comparisons
+
+
+def main(selectors: Optional[List[str]] = None, uses: Optional[List[str]] = None,
+         base_path: Path = BASE_PATH, baseline_file: Path = BASELINE_FILE,
+         current_file: Optional[Path] = None, phase: str = "total",
+         threshold: float = DEFAULT_THRESHOLD, alpha: float = DEFAULT_ALPHA,
+         warmup: int = DEFAULT_WARMUP, repeat: int = DEFAULT_REPEAT, disable_gc: bool = False,
+         update_baseline: bool = False, top: int = DEFAULT_TOP) -> int:
+    # Returns the exit code, 1 when an example or an operator regressed
+    if current_file is None:
+        # A file of its own, without the examples left by earlier runs of repeat_benchmark.py,
+        # so only the examples just measured are compared or become the baseline
+        current_file = run_benchmark(selectors, uses, base_path, warmup, repeat,
+                                     disable_gc=disable_gc, output_path=GATE_RESULTS_PATH,
+                                     merge=False)
+
+    if update_baseline:
+        shutil.copyfile(current_file, baseline_file)
+        print(f"Baseline updated from {current_file}, commit {baseline_file} to keep it")
+        return 0
+    if not baseline_file.exists():
+        print(f"{Fore.RED}No baseline in {baseline_file}, create it with --update-baseline")
+        return 2
+
+    baseline = load_cache(baseline_file)
+    current = load_cache(current_file)
+    comparisons = compare_benchmarks(baseline, current, phase, threshold, alpha)
+    regressions = [comparison for comparison in comparisons if comparison.regressed]
+
+    print(f"\nvtlengine {baseline.get('vtlengine')} (baseline) -> "
+          f"{current.get('vtlengine')} (current), {phase} phase, {len(comparisons)} comparisons")
+    print(f"Slowest changes (threshold {threshold:.0%}, alpha {alpha}):")
+    for comparison in sorted(comparisons, key=lambda c: -c.slowdown)[:top]:
+        color = Fore.RED if comparison.regressed else Fore.GREEN
+        print(f"{color}  {comparison.name}: {comparison.slowdown:+.1%} "
+              f"(p={comparison.p_value:.4f})")
+
+    if regressions:
+        print(f"{Fore.RED}\n{len(regressions)} performance regressions")
+        return 1
+    print(f"{Fore.GREEN}\nNo performance regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when the examples got significantly "
+                                                 "slower than the committed baseline")
+    parser.add_argument("selectors", nargs="*", metavar="SELECTOR",
+                        help='Examples to benchmark as in run_manual_examples.py (default all)')
+    parser.add_argument("--uses", action="append", metavar="KEYWORD",
+                        help="Only benchmark the examples whose script uses the VTL keyword")
+    parser.add_argument("--path", type=Path, default=BASE_PATH,
+                        help="Folder with the examples (default engine_files)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--current", type=Path,
+                        help="Results of repeat_benchmark.py to check instead of running it")
+    parser.add_argument("--phase", default="total",
+                        help='Phase compared, e.g. "run" (default total)')
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown of the median that fails, 0.2 is 20%%")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                        help="Significance level of the slowdown")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--no-gc", action="store_true",
+                        help="Disable the garbage collector during each measured run")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Replace the baseline with the current results")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help="Number of slowest changes printed")
+    args = parser.parse_args()
+
+    sys.exit(main(args.selectors, args.uses, args.path, args.baseline, args.current, args.phase,
+                  args.threshold, args.alpha, args.warmup, args.repeat, args.no_gc,
+                  args.update_baseline, args.top))
@@ -0,0 +1,169 @@
+import argparse
+import gc
+import os
+import platform
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from colorama import Fore, init
+
+from run_manual_examples import (BASE_PATH, RunOptions, TestResult, collect_tests, example_key,
+                                 load_cache, run_test, save_cache, timed)
+
+# Colorama initialization
+init(autoreset=True)
+
+DEFAULT_WARMUP = 1
+DEFAULT_REPEAT = 10
+
+# Confidence level and bootstrap resamples of the interval around the median
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 2000
+
+# One JSON file per vtlengine version, e.g. benchmark_results/vtlengine-1.9.5.json
+BENCHMARK_RESULTS_PATH = Path(__file__).parent / "benchmark_results"
+
+
+def results_file(engine_version: str, output_path: Path = BENCHMARK_RESULTS_PATH) -> Path:
+    return output_path / f"vtlengine-{engine_version}.json"
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    # The interval is a percentile bootstrap of the median, timings are rarely normal
+    values = np.array(samples, dtype=float)
+    rng = np.random.default_rng(0)
+    medians = np.median(rng.choice(values, size=(BOOTSTRAP_RESAMPLES, len(values))), axis=1)
+    ci_low, ci_high = np.percentile(medians, [50 * (1 - CONFIDENCE), 50 * (1 + CONFIDENCE)])
+    return {
+        "min": float(values.min()),
+        "median": float(np.median(values)),
+        "p95": float(np.percentile(values, 95)),
+        "mean": float(values.mean()),
+        "stddev": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+    }
+
+
+def measure(test_dir: Path, operator: str, options: RunOptions,
+            disable_gc: bool) -> Tuple[TestResult, Dict[str, float]]:
+    # One run of the example with its phase timings. The reference printed by run_test is
+    # discarded, so the console does not add noise to the timings
+    timings: Dict[str, float] = {}
+    gc.collect()
+    if disable_gc:
+        gc.disable()
+    try:
+        with open(os.devnull, mode='w') as devnull, redirect_stdout(devnull):
+            with timed(timings, "total"):
+                result = run_test(test_dir, operator, timings, options.columnar, None,
+                                  options.compiled, options.structures)
+    finally:
+        if disable_gc:
+            gc.enable()
+    return result, timings
+
+
+def benchmark_example(test_dir: Path, operator: str, warmup: int = DEFAULT_WARMUP,
+                      repeat: int = DEFAULT_REPEAT, options: RunOptions = RunOptions(),
+                      disable_gc: bool = False) -> Dict[str, Any]:
+    # Failing examples are not timed, their timings would measure the error path
+    result = ("", "", "Ok", "")
+    for _ in range(warmup):
+        result = measure(test_dir, operator, options, disable_gc)[0]
+        if result[2] != "Ok":
+            return {"result": result[2], "error": result[3], "samples": {}, "stats": {}}
+
+    samples: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        result, timings = measure(test_dir, operator, options, disable_gc)
+        if result[2] != "Ok":
+            return {"result": result[2], "error": result[3], "samples": {}, "stats": {}}
+        for phase, seconds in timings.items():
+            samples.setdefault(phase, []).append(seconds)
+    return {
+        "result": result[2],
+        "error": result[3],
+        "samples": samples,
+        "stats": {phase: summarize(values) for phase, values in samples.items()},
+    }
+
+
+def main(selectors: Optional[List[str]] = None, uses: Optional[List[str]] = None,
+         base_path: Path = BASE_PATH, warmup: int = DEFAULT_WARMUP,
+         repeat: int = DEFAULT_REPEAT, options: RunOptions = RunOptions(),
+         disable_gc: bool = False, output_path: Path = BENCHMARK_RESULTS_PATH,
+         merge: bool = True) -> Path:
+    # Returns the results file. With merge, the runs of other selections with the same version
+    # are kept and the examples run now replace their previous entry. Without it, the file only
+    # has this run
+    engine_version = version("vtlengine")
+    output_file = results_file(engine_version, output_path)
+    benchmark: Dict[str, Any] = load_cache(output_file) if merge else {}
+    benchmark.update({
+        "vtlengine": engine_version,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "warmup": warmup,
+        "repeat": repeat,
+        "gc_disabled": disable_gc,
+        "columnar": options.columnar,
+        "compiled": options.compiled,
+        "structures": options.structures,
+    })
+    examples = benchmark.setdefault("examples", {})
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    for test_dir, operator, test_name, _ in collect_tests(None, None, base_path, selectors, uses):
+        if test_dir is None:
+            continue
+        entry = benchmark_example(test_dir, operator, warmup, repeat, options, disable_gc)
+        examples[example_key(test_dir)] = entry
+        save_cache(benchmark, output_file)
+
+        if entry["result"] != "Ok":
+            print(f"{Fore.YELLOW}Operator: {operator}, Example: {test_name}, "
+                  f"Result: {entry['result']}, not timed")
+            continue
+        stats = entry["stats"]["total"]
+        print(f"{Fore.GREEN}Operator: {operator}, Example: {test_name}, "
+              f"min {stats['min'] * 1000:.2f}ms, median {stats['median'] * 1000:.2f}ms "
+              f"[{stats['ci_low'] * 1000:.2f}, {stats['ci_high'] * 1000:.2f}], "
+              f"p95 {stats['p95'] * 1000:.2f}ms, stddev {stats['stddev'] * 1000:.2f}ms")
+
+    print(f"\n\nBenchmark completed. Results saved in {output_file}")
+    return output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each example over repeated runs after a "
+                                                 "warmup, per vtlengine version")
+    parser.add_argument("selectors", nargs="*", metavar="SELECTOR",
+                        help='Examples to benchmark as in run_manual_examples.py (default all)')
+    parser.add_argument("--uses", action="append", metavar="KEYWORD",
+                        help="Only benchmark the examples whose script uses the VTL keyword")
+    parser.add_argument("--path", type=Path, default=BASE_PATH,
+                        help="Folder with the examples, e.g. scaled_files/<rows> "
+                             "(default engine_files)")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP,
+                        help="Untimed runs of each example before the measured ones")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Measured runs of each example")
+    parser.add_argument("--no-gc", action="store_true",
+                        help="Disable the garbage collector during each measured run")
+    parser.add_argument("--columnar", action="store_true")
+    parser.add_argument("--compiled", action="store_true")
+    parser.add_argument("--structures", action="store_true")
+    parser.add_argument("--output", type=Path, default=BENCHMARK_RESULTS_PATH)
+    args = parser.parse_args()
+    if args.repeat < 1 or args.warmup < 0:
+        parser.error("--repeat must be at least 1 and --warmup at least 0")
+
+    main(args.selectors, args.uses, args.path, args.warmup, args.repeat,
+         RunOptions(columnar=args.columnar, compiled=args.compiled, structures=args.structures),
+         args.no_gc, args.output)
@@ -0,0 +1,220 @@
+import argparse
+import csv
+import json
+import platform
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from run_manual_examples import TestResult
+
+# History of every run, results are appended and never overwritten
+RESULTS_DB = Path(__file__).parent / "test_results.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    finished TEXT,
+    vtlengine TEXT NOT NULL,
+    host TEXT NOT NULL,
+    git_commit TEXT,
+    base_path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    total INTEGER,
+    passed INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    operator TEXT NOT NULL,
+    example TEXT NOT NULL,
+    result TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+-- Phase timings ("run_s") and memory peaks ("run_traced_mb") of each result
+CREATE TABLE IF NOT EXISTS measurements (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    operator TEXT NOT NULL,
+    example TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_example ON results (operator, example, run_id);
+CREATE INDEX IF NOT EXISTS measurements_example ON measurements (operator, example, metric,
+                                                                  run_id);
+CREATE INDEX IF NOT EXISTS measurements_run ON measurements (run_id);
+"""
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def connect(db_file: Path = RESULTS_DB) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_file)
+    # Every result is committed as soon as it is written, WAL keeps those commits cheap
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ResultsStore:
+    # Appends one run and its results to the database, committed row by row so an interrupted
+    # run keeps its partial results
+    def __init__(self, db_file: Path = RESULTS_DB, base_path: Optional[Path] = None,
+                 options: Optional[Dict[str, Any]] = None) -> None:
+        self.db_file = db_file
+        self.base_path = base_path
+        self.options = options or {}
+        self.run_id: Optional[int] = None
+        self.total = 0
+        self.passed = 0
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> "ResultsStore":
+        self._connection = connect(self.db_file)
+        cursor = self._connection.execute(
+            "INSERT INTO runs (started, vtlengine, host, git_commit, base_path, options) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (datetime.now(timezone.utc).isoformat(timespec="seconds"), version("vtlengine"),
+             platform.node(), git_commit(), str(self.base_path or ""),
+             json.dumps(self.options, sort_keys=True)))
+        self.run_id = cursor.lastrowid
+        self._connection.commit()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._connection is None:
+            return
+        self._connection.execute(
+            "UPDATE runs SET finished = ?, total = ?, passed = ? WHERE id = ?",
+            (datetime.now(timezone.utc).isoformat(timespec="seconds"), self.total, self.passed,
+             self.run_id))
+        self._connection.commit()
+        self._connection.close()
+
+    def write(self, result: TestResult, timings: Optional[Dict[str, float]] = None,
+              memory: Optional[Dict[str, Any]] = None) -> None:
+        assert self._connection is not None, "ResultsStore used outside of its with block"
+        self.total += 1
+        if result[2] == "Ok":
+            self.passed += 1
+        operator, example = result[:2]
+        self._connection.execute("INSERT INTO results VALUES (?, ?, ?, ?, ?)",
+                                 (self.run_id, *result))
+        metrics = {f"{phase}_s": seconds for phase, seconds in (timings or {}).items()}
+        metrics.update({key: value for key, value in (memory or {}).items()
+                        if isinstance(value, (int, float))})
+        self._connection.executemany(
+            "INSERT INTO measurements VALUES (?, ?, ?, ?, ?)",
+            [(self.run_id, operator, example, metric, value) for metric, value in metrics.items()])
+        self._connection.commit()
+
+
+def resolve_run(connection: sqlite3.Connection, run_id: Optional[int] = None) -> int:
+    # The latest run when run_id is None
+    if run_id is not None:
+        return run_id
+    row = connection.execute("SELECT MAX(id) FROM runs").fetchone()
+    if row[0] is None:
+        raise ValueError("The database has no runs")
+    return int(row[0])
+
+
+def run_results(connection: sqlite3.Connection, run_id: int) -> List[TestResult]:
+    # In the order they were written, which is the order of test_result.csv
+    return connection.execute(
+        "SELECT operator, example, result, error FROM results WHERE run_id = ? ORDER BY rowid",
+        (run_id,)).fetchall()
+
+
+def export_csv(csv_file: Path, run_id: Optional[int] = None, db_file: Path = RESULTS_DB) -> None:
+    with connect(db_file) as connection:
+        results = run_results(connection, resolve_run(connection, run_id))
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Operator", "Example", "Result", "Error"])
+        writer.writerows(results)
+
+
+def export_xlsx(xlsx_file: Path, run_id: Optional[int] = None,
+                db_file: Path = RESULTS_DB) -> None:
+    # Same layout as vtlengine_results.xlsx, one "<date>_test_result" sheet. Needs openpyxl
+    with connect(db_file) as connection:
+        run_id = resolve_run(connection, run_id)
+        started = connection.execute("SELECT started FROM runs WHERE id = ?",
+                                     (run_id,)).fetchone()[0]
+        results = run_results(connection, run_id)
+    data = pd.DataFrame(results, columns=["Operator", "Example", "Result", "Error"])
+    data.to_excel(xlsx_file, sheet_name=f"{started[:10]}_test_result", index=False)
+
+
+def print_runs(limit: int, db_file: Path = RESULTS_DB) -> None:
+    with connect(db_file) as connection:
+        runs = connection.execute(
+            "SELECT id, started, vtlengine, host, git_commit, base_path, total, passed "
+            "FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    for run_id, started, engine, host, commit, base_path, total, passed in runs:
+        print(f"Run {run_id}: {started}, vtlengine {engine}, {host}, commit "
+              f"{(commit or '')[:10]}, {passed}/{total} passed, {base_path}")
+
+
+def print_history(operator: str, example: str, limit: int, db_file: Path = RESULTS_DB) -> None:
+    with connect(db_file) as connection:
+        history = connection.execute(
+            "SELECT runs.id, runs.started, runs.vtlengine, results.result, results.error, "
+            "measurements.value FROM results JOIN runs ON runs.id = results.run_id "
+            "LEFT JOIN measurements ON measurements.run_id = results.run_id "
+            "AND measurements.operator = results.operator "
+            "AND measurements.example = results.example AND measurements.metric = 'total_s' "
+            "WHERE results.operator = ? AND results.example = ? "
+            "ORDER BY runs.id DESC LIMIT ?", (operator, example, limit)).fetchall()
+    for run_id, started, engine, result, error, seconds in history:
+        duration = f"{seconds:.3f}s" if seconds is not None else "-"
+        print(f"Run {run_id}: {started}, vtlengine {engine}, {result}, {duration} {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query and export the results history")
+    parser.add_argument("--db", type=Path, default=RESULTS_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    runs_parser = subparsers.add_parser("runs", help="List the latest runs")
+    runs_parser.add_argument("--limit", type=int, default=20)
+    history_parser = subparsers.add_parser("history", help="Results of an example over the runs")
+    history_parser.add_argument("example", help='Example as "Operator/ex_N"')
+    history_parser.add_argument("--limit", type=int, default=20)
+    export_parser = subparsers.add_parser("export", help="Export a run as test_result.csv or "
+                                                         "vtlengine_results.xlsx")
+    export_parser.add_argument("--run", type=int, help="Run id (default the latest)")
+    export_parser.add_argument("--csv", type=Path)
+    export_parser.add_argument("--xlsx", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "runs":
+        print_runs(args.limit, args.db)
+    elif args.command == "history":
+        operator, _, example = args.example.partition("/")
+        print_history(operator, example, args.limit, args.db)
+    else:
+        if args.csv is None and args.xlsx is None:
+            parser.error("export needs --csv and/or --xlsx")
+        if args.csv is not None:
+            export_csv(args.csv, args.run, args.db)
+            print(f"Run exported to {args.csv}")
+        if args.xlsx is not None:
+            try:
+                export_xlsx(args.xlsx, args.run, args.db)
+            except ImportError as e:
+                parser.error(f"the xlsx export needs openpyxl: {e}")
+            print(f"Run exported to {args.xlsx}")
@@ -1,25 +1,94 @@
 import pandas as pd
+import argparse
+import cProfile
+import hashlib
 import json
 import csv
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from importlib.metadata import version
 from pathlib import Path
 from vtlengine import run
 from vtlengine.API import load_datasets_with_data
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import (Callable, Dict, Any, Iterator, List, Mapping, NamedTuple, Optional, Union,
+                    Tuple)
 from colorama import Fore, init
 
+from compare import compare_datasets
+
 
 # Colorama initialization
 init(autoreset=True)
 
+# Result states of the examples stopped by the isolation limits
+LIMIT_RESULTS = ["Timeout", "MemoryLimit"]
 
-def format_structure(structure_dict: Dict[str, Any]) -> Dict[str, Any]:
-    for ds in structure_dict["structures"]:
-        for comp in ds["components"]:
-            if "TimePeriod" in comp["data_type"]:
-                comp["data_type"] = comp["data_type"].replace("TimePeriod", "Time_Period")
-            if "TimeInterval" in comp["data_type"]:
-                comp["data_type"] = comp["data_type"].replace("TimeInterval", "Time_Interval")
+# Phases of run_test measured in the timings sidecar file, in execution order. compile, the
+# parsing of the script, is only measured with --compiled, run still includes it (see compiled.py)
+TIMING_PHASES = ["load_json", "format_structure", "read_csv", "load_reference", "compile", "run",
+                 "compare"]
+
+# Number of allocation sites reported per example when profiling memory
+TOP_ALLOCATIONS = 10
+
+MB = 1024 * 1024
+
+BASE_PATH = Path(__file__).parent / "engine_files"
+
+# Last result of each example, reused while neither the example nor vtlengine change
+CACHE_FILE = Path(__file__).parent / ".test_cache.json"
+
+# Last measured duration of each example, used to start the longest examples first
+DURATIONS_FILE = Path(__file__).parent / ".test_durations.json"
+
+# cProfile statistics of each example, e.g. profiles/engine_files/Join/ex_1.prof
+PROFILES_PATH = Path(__file__).parent / "profiles"
+
+TestResult = Tuple[str, str, str, str]
+TimedResult = Tuple[TestResult, Dict[str, float], Optional[Dict[str, Any]]]
+# Example folder (None for not implemented tests), operator, example and known result
+PlannedTest = Tuple[Optional[Path], str, str, Optional[TestResult]]
+
+
+class RunOptions(NamedTuple):
+    # How each example is run, shared by the runner and its worker processes
+    columnar: bool = False  # Datapoints from their Parquet copies (see columnar.py)
+    profile_memory: bool = False
+    compiled: bool = False  # Script parsing timed apart (see compiled.py)
+    structures: bool = False  # Formatted structures reused (see structures.py)
+    repeat: int = 1  # Runs of each example, the timings keep the fastest one
+    profile: bool = False  # cProfile statistics saved in PROFILES_PATH
+
+
+# Options of RunOptions that can change the result of an example, not only its timings
+RESULT_OPTIONS = ["columnar", "structures"]
 
+
+class Limits(NamedTuple):
+    # Bounds of each example when running isolated, None leaves the bound unset
+    timeout: Optional[float] = None  # Wall-clock seconds
+    cpu_seconds: Optional[int] = None
+    memory_mb: Optional[int] = None  # Address space
+    isolate: bool = False  # Isolates the examples even without any bound
+
+    @property
+    def isolated(self) -> bool:
+        return self.isolate or any(limit is not None for limit in self[:3])
+
+
+def format_type(data_type: str) -> str:
+    return data_type.replace("TimePeriod", "Time_Period").replace("TimeInterval", "Time_Interval")
+
+
+def format_structure(structure_dict: Dict[str, Any]) -> Dict[str, Any]:
+    # Builds a new structure, structure_dict is left untouched so it can be cached or shared
     return {
         "datasets": [
             {
@@ -27,7 +96,7 @@ def format_structure(structure_dict: Dict[str, Any]) -> Dict[str, Any]:
                 "DataStructure": [
                     {
                         "name": comp["name"],
-                        "type": comp["data_type"],
+                        "type": format_type(comp["data_type"]),
                         "role": comp["role"],
                         "nullable": comp["role"] != "Identifier" if
                         "nullable" not in comp.keys() else comp["nullable"],
@@ -50,27 +119,145 @@ def collect_datapoints(test_dir: Path, input_structure: Dict[str, Any]) -> List[
             (test_dir / f"{ds['name']}.csv").exists()]
 
 
-def run_test(test_dir: Path, operator: str) -> Tuple[str, str, str, str]:
+def count_rows(test_dir: Path) -> int:
+    # Number of input datapoints of the example, DS_r.csv is the reference
+    rows = 0
+    for csv_file in test_dir.glob("*.csv"):
+        if csv_file.name == "DS_r.csv":
+            continue
+        with csv_file.open(encoding='utf-8') as f:
+            rows += sum(1 for _ in f) - 1
+    return rows
+
+
+def input_size(test_dir: Path) -> int:
+    # Bytes of the input datapoints of the example, DS_r.csv is the reference
+    return sum(csv_file.stat().st_size for csv_file in test_dir.glob("*.csv")
+               if csv_file.name != "DS_r.csv")
+
+
+def example_key(test_dir: Path) -> str:
+    # Relative to the repository, so scaled variants of an example keep their own history
+    test_dir = test_dir.resolve()
     try:
-        input_structure = format_structure(load_json(test_dir / "input.json"))
-        reference_structure = format_structure(load_json(test_dir / "output.json"))
-
-        reference_name = reference_structure['datasets'][0]['name']
-        reference_data = {reference_name: pd.read_csv(test_dir / "DS_r.csv")}
-        reference_datasets = load_datasets_with_data(reference_structure, reference_data)[0]
-        print(reference_datasets)
-
-        datapoints = collect_datapoints(test_dir, input_structure)
-        result = run(
-            script=test_dir / "transformation.vtl",
-            data_structures=input_structure,
-            datapoints=datapoints,
-            return_only_persistent=False
-        )
-
-        if result != reference_datasets:
-            return operator, test_dir.name, "Fail", "Assertion Error"
+        return test_dir.relative_to(Path(__file__).parent.resolve()).as_posix()
+    except ValueError:
+        return test_dir.as_posix()
+
+
+def expected_durations(tasks: List[Tuple[Path, str]], durations: Dict[str, float]) -> List[float]:
+    # Seconds from the last run of each example. Examples without history are estimated from
+    # their input size, at the median seconds per byte of the examples that have it
+    keys = [example_key(test_dir) for test_dir, _ in tasks]
+    sizes = [input_size(test_dir) for test_dir, _ in tasks]
+    rates = sorted(durations[key] / size for key, size in zip(keys, sizes)
+                   if key in durations and size > 0)
+    if not rates:
+        return [float(size) for size in sizes]
+    seconds_per_byte = rates[len(rates) // 2]
+    return [durations[key] if key in durations else size * seconds_per_byte
+            for key, size in zip(keys, sizes)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    # High-water mark of the resident set size of the process, not available on Windows
+    if sys.platform == "win32":
+        return None
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], phase: str,
+          memory: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+    # Accumulates the elapsed time (monotonic clock) of the block into timings[phase]. With
+    # memory, also records the tracemalloc peak of the block and the peak RSS at its end
+    if memory is not None:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+        if memory is not None:
+            traced_peak = tracemalloc.get_traced_memory()[1] / MB
+            memory[f"{phase}_traced_mb"] = max(traced_peak, memory.get(f"{phase}_traced_mb", 0))
+            memory[f"{phase}_rss_mb"] = peak_rss_mb()
+
+
+def run_test(test_dir: Path, operator: str,
+             timings: Optional[Dict[str, float]] = None,
+             columnar: bool = False,
+             memory: Optional[Dict[str, Any]] = None,
+             compiled: bool = False,
+             structures: bool = False) -> TestResult:
+    # Examples without output.json (e.g. the scaled ones) are only executed, not compared
+    has_reference = (test_dir / "output.json").exists()
+    try:
+        if structures:
+            from structures import load_structures
+            # Already formatted, so there is no format_structure phase
+            with timed(timings, "load_json", memory):
+                input_structure, reference_structure = load_structures(test_dir)
+        else:
+            with timed(timings, "load_json", memory):
+                input_json = load_json(test_dir / "input.json")
+                output_json = load_json(test_dir / "output.json") if has_reference else None
+            with timed(timings, "format_structure", memory):
+                input_structure = format_structure(input_json)
+                reference_structure = format_structure(output_json) if output_json else None
+
+        if columnar:
+            from columnar import load_columnar, load_datapoints
+        if reference_structure is not None:
+            reference_name = reference_structure['datasets'][0]['name']
+            with timed(timings, "read_csv", memory):
+                if columnar:
+                    reference_data = {reference_name: load_columnar(
+                        test_dir / "DS_r.csv",
+                        reference_structure['datasets'][0]['DataStructure'])}
+                else:
+                    reference_data = {reference_name: pd.read_csv(test_dir / "DS_r.csv")}
+            with timed(timings, "load_reference", memory):
+                reference_datasets = load_datasets_with_data(reference_structure,
+                                                             reference_data)[0]
+            print(reference_datasets)
+
+        datapoints: Union[List[Path], Dict[str, pd.DataFrame]]
+        if columnar:
+            with timed(timings, "read_csv", memory):
+                datapoints = load_datapoints(test_dir, input_structure)
+        else:
+            datapoints = collect_datapoints(test_dir, input_structure)
+        if compiled:
+            from compiled import parse_script, read_script
+            script = read_script(test_dir / "transformation.vtl")
+            with timed(timings, "compile", memory):
+                parse_script(script)
+        with timed(timings, "run", memory):
+            result = run(
+                script=test_dir / "transformation.vtl",
+                data_structures=input_structure,
+                datapoints=datapoints,
+                return_only_persistent=False
+            )
+        if memory is not None:
+            # Inputs, reference and result are all alive at this point
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+            memory["top_allocations"] = [str(statistic) for statistic in statistics]
+
+        if reference_structure is None:
+            return operator, test_dir.name, "Ok", ""
+        with timed(timings, "compare", memory):
+            differences = compare_datasets(result, reference_datasets)
+        if differences:
+            return operator, test_dir.name, "Fail", "Assertion Error: " + " | ".join(differences)
         return operator, test_dir.name, "Ok", ""
+    except MemoryError:
+        return operator, test_dir.name, "MemoryLimit", "MemoryError"
     except Exception as e:
         error = str(e)
         if '\n' in error:
@@ -78,56 +265,435 @@ def run_test(test_dir: Path, operator: str) -> Tuple[str, str, str, str]:
         return operator, test_dir.name, "Fail", error
 
 
+def run_test_timed(test_dir: Path, operator: str,
+                   options: RunOptions = RunOptions()) -> TimedResult:
+    timings: Dict[str, float] = {}
+    memory: Optional[Dict[str, Any]] = None
+    profiler = cProfile.Profile() if options.profile else None
+    if options.profile_memory:
+        memory = {"rows": count_rows(test_dir)}
+        tracemalloc.start()
+    try:
+        with timed(timings, "total"):
+            if profiler is not None:
+                profiler.enable()
+            result = run_test(test_dir, operator, timings, options.columnar, memory,
+                              options.compiled, options.structures)
+    finally:
+        if memory is not None:
+            tracemalloc.stop()
+            memory["total_traced_mb"] = max(
+                [value for key, value in memory.items() if key.endswith("_traced_mb")],
+                default=0.0)
+            memory["total_rss_mb"] = peak_rss_mb()
+
+    # Repetitions only time the example again, each phase keeps its fastest run
+    for _ in range(options.repeat - 1):
+        if result[2] != "Ok":
+            break
+        repetition: Dict[str, float] = {}
+        with timed(repetition, "total"):
+            result = run_test(test_dir, operator, repetition, options.columnar, None,
+                              options.compiled, options.structures)
+        for phase, seconds in repetition.items():
+            timings[phase] = min(timings.get(phase, seconds), seconds)
+
+    if profiler is not None:
+        profiler.disable()
+        profile_file = PROFILES_PATH / f"{example_key(test_dir)}.prof"
+        profile_file.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_file)
+    return result, timings, memory
+
+
+def set_limits(limits: Limits) -> None:
+    # Resource limits of the current process, only the wall-clock timeout applies on Windows
+    if sys.platform == "win32":
+        return
+    import resource
+    if limits.cpu_seconds is not None:
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 1))
+    if limits.memory_mb is not None:
+        memory_bytes = limits.memory_mb * MB
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def isolated_child(connection: Any, limits: Limits, test_dir: Path, operator: str,
+                   options: RunOptions) -> None:
+    set_limits(limits)
+    try:
+        connection.send(run_test_timed(test_dir, operator, options))
+    except MemoryError:
+        connection.send(((operator, test_dir.name, "MemoryLimit", "MemoryError"), {}, None))
+    finally:
+        connection.close()
+
+
+def run_test_isolated(test_dir: Path, operator: str, limits: Limits,
+                      options: RunOptions = RunOptions()) -> TimedResult:
+    # Runs the example in a child process, which is killed when it exceeds the timeout
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=isolated_child,
+        args=(sender, limits, test_dir, operator, options))
+    start = time.perf_counter()
+    process.start()
+    sender.close()
+    timed_out = False
+    try:
+        if receiver.poll(limits.timeout):
+            timed_result: TimedResult = receiver.recv()
+            return timed_result
+        timed_out = True
+    except EOFError:
+        # The child died without sending its result
+        pass
+    finally:
+        if process.is_alive() and timed_out:
+            process.kill()
+        process.join()
+        receiver.close()
+
+    timings = {"total": time.perf_counter() - start}
+    if timed_out:
+        return (operator, test_dir.name, "Timeout", f"Wall-clock limit of {limits.timeout}s"), \
+            timings, None
+    if sys.platform != "win32" and limits.cpu_seconds is not None and \
+            process.exitcode == -signal.SIGXCPU:
+        return (operator, test_dir.name, "Timeout", f"CPU limit of {limits.cpu_seconds}s"), \
+            timings, None
+    if limits.memory_mb is not None:
+        return (operator, test_dir.name, "MemoryLimit",
+                f"Worker exited with code {process.exitcode} under a {limits.memory_mb}MB "
+                f"limit"), timings, None
+    return (operator, test_dir.name, "Fail", f"Worker exited with code {process.exitcode}"), \
+        timings, None
+
+
+def longest_first(submit: Callable[[Tuple[Path, str]], Callable[[], TimedResult]],
+                  tasks: List[Tuple[Path, str]],
+                  expected: Optional[List[float]] = None) -> Iterator[TimedResult]:
+    # Tasks are queued longest expected first and each idle worker takes the next one, so the
+    # slowest examples do not end up alone at the end of the run. submit queues a task and
+    # returns the function that waits for its result
+    order = list(range(len(tasks)))
+    if expected is not None:
+        order.sort(key=expected.__getitem__, reverse=True)
+    pending = {i: submit(tasks[i]) for i in order}
+    for i in range(len(tasks)):
+        yield pending[i]()
+
+
+def run_tests(tasks: List[Tuple[Path, str]], jobs: int = 1, options: RunOptions = RunOptions(),
+              limits: Limits = Limits(),
+              expected: Optional[List[float]] = None) -> Iterator[TimedResult]:
+    # Results are yielded in the same order as the tasks, whatever the completion order.
+    # expected holds the estimated seconds of each task, used to schedule the parallel runs
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if limits.isolated and tasks:
+        # Every example gets its own child process, the threads only wait for them
+        run_isolated = partial(run_test_isolated, limits=limits, options=options)
+        with ThreadPoolExecutor(max_workers=min(jobs, len(tasks))) as thread_executor:
+            yield from longest_first(
+                lambda task: thread_executor.submit(run_isolated, *task).result, tasks, expected)
+        return
+    run_task = partial(run_test_timed, options=options)
+    if options.profile_memory and tasks:
+        # Each example runs in a fresh process, so the peak RSS only accounts for that example
+        with multiprocessing.Pool(min(jobs, len(tasks)), maxtasksperchild=1) as pool:
+            yield from longest_first(
+                lambda task: pool.apply_async(run_task, task).get, tasks, expected)
+        return
+    if jobs == 1 or len(tasks) <= 1:
+        for test_dir, operator in tasks:
+            yield run_task(test_dir, operator)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        yield from longest_first(
+            lambda task: executor.submit(run_task, *task).result, tasks, expected)
+
+
+class ResultSink:
+    # Writes every result as soon as it is available (flushed row by row, so an interrupted run
+    # keeps its partial results) and keeps the summary counters, without holding the results
+    def __init__(self, csv_file: Optional[Path] = None, jsonl: bool = False,
+                 profile_memory: bool = False, store: Any = None) -> None:
+        self.csv_file = csv_file
+        self.timings_file = csv_file.with_name("test_timings.csv") if csv_file else None
+        self.memory_file = csv_file.with_name("test_memory.csv") if csv_file else None
+        self.jsonl = jsonl
+        self.profile_memory = profile_memory
+        self.total = 0
+        self.passed = 0
+        self.phase_totals: Dict[str, float] = {}
+        self._files: List[Any] = []
+        self._writer: Any = None
+        self._timings_writer: Any = None
+        self._jsonl_file: Any = None
+        self._memory_writer: Any = None
+        self._allocations_file: Any = None
+        # results_db.ResultsStore appending the results to the history of runs
+        self.store = store
+
+    def __enter__(self) -> "ResultSink":
+        if self.store is not None:
+            self.store.__enter__()
+        if self.csv_file is not None and self.timings_file is not None:
+            self._writer = csv.writer(self._open(self.csv_file))
+            self._writer.writerow(["Operator", "Example", "Result", "Error"])
+            self._timings_writer = csv.writer(self._open(self.timings_file))
+            self._timings_writer.writerow(
+                ["Operator", "Example"] + [f"{phase}_s" for phase in TIMING_PHASES + ["total"]])
+            if self.jsonl:
+                self._jsonl_file = self._open(self.csv_file.with_suffix(".jsonl"))
+            if self.profile_memory and self.memory_file is not None:
+                self._memory_writer = csv.writer(self._open(self.memory_file))
+                self._memory_writer.writerow(
+                    ["Operator", "Example", "Rows"]
+                    + [f"{phase}_traced_mb" for phase in TIMING_PHASES + ["total"]]
+                    + [f"{phase}_rss_mb" for phase in TIMING_PHASES + ["total"]]
+                    + ["traced_bytes_per_row"])
+                self._allocations_file = self._open(self.memory_file.with_name(
+                    "test_memory_top.txt"))
+            for f in self._files:
+                f.flush()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        for f in self._files:
+            f.close()
+        if self.store is not None:
+            self.store.__exit__(*args)
+
+    def _open(self, file: Path) -> Any:
+        f = file.open(mode='w', newline='', encoding='utf-8')
+        self._files.append(f)
+        return f
+
+    def write(self, result: TestResult, timings: Optional[Dict[str, float]] = None,
+              memory: Optional[Dict[str, Any]] = None) -> None:
+        self.total += 1
+        if result[2] == "Ok":
+            self.passed += 1
+        for phase, seconds in (timings or {}).items():
+            self.phase_totals[phase] = self.phase_totals.get(phase, 0.0) + seconds
+        if self.store is not None:
+            self.store.write(result, timings, memory)
+
+        if self._writer is not None:
+            self._writer.writerow(result)
+            if timings:
+                self._timings_writer.writerow(list(result[:2]) + [
+                    f"{timings[phase]:.6f}" if phase in timings else ""
+                    for phase in TIMING_PHASES + ["total"]
+                ])
+            if self._memory_writer is not None and memory:
+                self.write_memory(result, memory)
+            if self._jsonl_file is not None:
+                self._jsonl_file.write(json.dumps(dict(zip(
+                    ["operator", "example", "result", "error"], result)), ensure_ascii=False)
+                    + "\n")
+            for f in self._files:
+                f.flush()
+
+    def write_memory(self, result: TestResult, memory: Dict[str, Any]) -> None:
+        phases = TIMING_PHASES + ["total"]
+        rows = memory["rows"]
+        total_traced = memory.get("total_traced_mb")
+        per_row = f"{total_traced * MB / rows:.1f}" if rows and total_traced else ""
+        self._memory_writer.writerow(
+            list(result[:2]) + [rows]
+            + [f"{memory[f'{phase}_traced_mb']:.3f}" if f"{phase}_traced_mb" in memory else ""
+               for phase in phases]
+            + [f"{memory[f'{phase}_rss_mb']:.1f}" if memory.get(f"{phase}_rss_mb") else ""
+               for phase in phases]
+            + [per_row])
+        self._allocations_file.write(f"{result[0]} / {result[1]} ({rows} rows)\n")
+        for line in memory.get("top_allocations", []):
+            self._allocations_file.write(f"    {line}\n")
+        self._allocations_file.write("\n")
+
+
+def print_phase_totals(phase_totals: Dict[str, float]) -> None:
+    total = phase_totals.get("total", 0.0)
+    print("\nTime per phase:")
+    for phase in TIMING_PHASES:
+        if phase not in phase_totals:
+            continue
+        phase_total = phase_totals[phase]
+        share = (phase_total * 100) / total if total else 0
+        print(f"  {phase}: {phase_total:.3f}s ({share:.1f}%)")
+    print(f"  total: {total:.3f}s")
+
+
+def cache_key(test_dir: Path, options: RunOptions) -> str:
+    # The example folder plus the options that change its result, e.g.
+    # "engine_files/Join/ex_1 columnar", so each way of running an example keeps its own entry
+    changed = [name for name in RESULT_OPTIONS if getattr(options, name)]
+    return " ".join([example_key(test_dir)] + changed)
+
+
+def example_hash(test_dir: Path, engine_version: str) -> str:
+    digest = hashlib.sha256(engine_version.encode())
+    for file in sorted(test_dir.iterdir()):
+        if file.is_file():
+            digest.update(file.name.encode())
+            digest.update(b"\0")
+            digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def load_cache(cache_file: Path = CACHE_FILE) -> Dict[str, Any]:
+    try:
+        cache: Dict[str, Any] = load_json(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return cache
+
+
+def save_cache(cache: Dict[str, Any], cache_file: Path = CACHE_FILE) -> None:
+    # Written to a temporary file first so an interrupted run never leaves a corrupt cache
+    tmp_file = cache_file.with_suffix(".tmp")
+    with tmp_file.open(mode='w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    tmp_file.replace(cache_file)
+
+
 def print_colored_result(operator: str, example: str, result: str, error: str) -> None:
     color = Fore.GREEN if result == "Ok" else (
         Fore.YELLOW) if result == "Not implemented" else Fore.RED
     print(f"{color}Operator: {operator}, Example: {example}, Result: {result}, Error: {error}")
 
 
-def main(selected_tests: Optional[Dict[str, Union[str, List[str]]]] = None,
-         not_implemented: Optional[Dict[str, Union[str, List[str]]]] = None,
-         verbose: bool = False) -> None:
-    base_path = Path(__file__).parent / "engine_files"
-    results = []
+def normalize_tests(tests: Optional[Mapping[str, Union[str, List[str]]]]) -> Dict[str, List[str]]:
+    # A single example can be given as a string, {"Case": "ex_1"} is {"Case": ["ex_1"]}
+    return {operator: [examples] if isinstance(examples, str) else list(examples)
+            for operator, examples in (tests or {}).items()}
+
+
+def collect_tests(selected_tests: Optional[Dict[str, List[str]]] = None,
+                  not_implemented: Optional[Dict[str, List[str]]] = None,
+                  base_path: Path = BASE_PATH,
+                  selectors: Optional[List[str]] = None,
+                  uses: Optional[List[str]] = None) -> List[PlannedTest]:
+    # Every test in output order, with its result when it is known without running it
+    from manifest import select_examples
+    plan: List[PlannedTest] = []
+
+    selection = select_examples(base_path, selected_tests, selectors, uses)
+    for operator, examples in selection.items():
+        if not_implemented and operator in not_implemented:
+            plan.extend([(None, operator, test, (operator, test, "Not implemented", ""))
+                         for test in not_implemented[operator]])
+
+        for test_name in examples:
+            if not not_implemented or test_name not in not_implemented.get(operator, []):
+                plan.append((base_path / operator / test_name, operator, test_name, None))
 
-    for operator_dir in base_path.iterdir():
-        if operator_dir.is_dir():
-            if selected_tests and operator_dir.name not in selected_tests:
+    return plan
+
+
+# Pass selected_tests to run only the selected tests, default None runs all of them
+# Pass not_implemented to report those tests as not implemented without running them
+# Pass verbose=True to print the results of each test in the console, default False
+# Pass jobs=N to run the tests over N worker processes, longest expected first, default 1
+# Pass use_cache=True to skip the examples whose files and vtlengine version did not change
+# Pass options=RunOptions(...) to choose how each example is loaded, run, timed and profiled
+# Pass jsonl=True to also write the results as JSON Lines
+# Pass base_path to run the examples of another folder, e.g. the scaled ones
+# Pass limits=Limits(timeout, cpu_seconds, memory_mb) to run each example isolated
+# Pass selectors=["Join/*", "re:^Time"] to also run the examples matching the patterns
+# Pass uses=["over"] to only run the examples whose script uses one of the VTL keywords
+def main(selected_tests: Optional[Mapping[str, Union[str, List[str]]]] = None,
+         not_implemented: Optional[Mapping[str, Union[str, List[str]]]] = None,
+         verbose: bool = False,
+         jobs: int = 1,
+         use_cache: bool = False,
+         options: RunOptions = RunOptions(),
+         jsonl: bool = False,
+         base_path: Path = BASE_PATH,
+         limits: Limits = Limits(),
+         selectors: Optional[List[str]] = None,
+         uses: Optional[List[str]] = None,
+         record: bool = True) -> None:
+    selected = normalize_tests(selected_tests)
+    skipped = normalize_tests(not_implemented)
+    plan = collect_tests(selected, skipped, base_path, selectors, uses)
+
+    cache = load_cache() if use_cache else {}
+    hashes = {}
+    if use_cache:
+        engine_version = version("vtlengine")
+        for i, (test_dir, operator, test_name, result) in enumerate(plan):
+            if test_dir is None:
                 continue
+            key = cache_key(test_dir, options)
+            hashes[key] = example_hash(test_dir, engine_version)
+            cached = cache.get(key)
+            if cached is not None and cached["hash"] == hashes[key]:
+                plan[i] = (test_dir, operator, test_name,
+                           (operator, test_name, cached["result"], cached["error"]))
+
+    tasks = [(test_dir, operator) for test_dir, operator, _, result in plan
+             if test_dir is not None and result is None]
+    if use_cache and verbose:
+        print(f"Cache hits: {len(hashes) - len(tasks)}, examples to run: {len(tasks)}")
+    durations: Dict[str, float] = load_cache(DURATIONS_FILE)
+    expected = expected_durations(tasks, durations) if jobs != 1 else None
+
+    csv_file: Optional[Path] = None
+    if not selected and not selectors and not uses:
+        # Runs over other example folders (e.g. scaled_files/<rows>) keep their results there
+        results_path = Path(__file__).parent if base_path == BASE_PATH else base_path
+        csv_file = results_path / "test_result.csv"
+
+    store = None
+    if record:
+        from results_db import ResultsStore
+        store = ResultsStore(base_path=base_path, options={
+            "jobs": jobs, "cache": use_cache, **options._asdict(), **limits._asdict(),
+            "selected": selected, "selectors": selectors, "uses": uses})
 
-            if not_implemented and operator_dir.name in not_implemented:
-                results.extend([(operator_dir.name, test, "Not implemented", "") for test
-                                in not_implemented[operator_dir.name]])
-
-            for test_dir in operator_dir.iterdir():
-                test_name = test_dir.name
-                if (
-                        not selected_tests or test_name in selected_tests.get(operator_dir.name, [])
-                ) and (
-                        not not_implemented or test_name not in
-                        not_implemented.get(operator_dir.name, [])
-                ):
-                    results.append(run_test(test_dir, operator_dir.name))
-
-    if verbose:
-        for result in results:
-            print_colored_result(*result)
-
-    if selected_tests is None or selected_tests == {}:
-        csv_file = Path(__file__).parent / "test_result.csv"
-        with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Operator", "Example", "Result", "Error"])
-            writer.writerows(results)
-        print(f"\n\nTests completed. Results saved in {csv_file}")
-
-    if not_implemented is not None and not_implemented != {}:
-        not_implemented_tests = sum(1 for test in not_implemented.values() for _ in test)
-    else:
-        not_implemented_tests = 0
-
-    total_tests = len(results)
-    passed_tests = sum(1 for _, _, result, _ in results if result == "Ok")
+    # Results are consumed in plan order as they become available
+    executed = run_tests(tasks, jobs, options, limits, expected)
+    with ResultSink(csv_file, jsonl, options.profile_memory, store) as sink:
+        try:
+            for test_dir, operator, test_name, result in plan:
+                example_timings = example_memory = None
+                if result is None:
+                    result, example_timings, example_memory = next(executed)
+                    if test_dir is not None and "total" in example_timings:
+                        durations[example_key(test_dir)] = example_timings["total"]
+                    # Hitting a limit depends on the limits of this run, it is not cached
+                    if use_cache and test_dir is not None and result[2] not in LIMIT_RESULTS:
+                        key = cache_key(test_dir, options)
+                        cache[key] = {"hash": hashes[key], "result": result[2],
+                                      "error": result[3]}
+                sink.write(result, example_timings, example_memory)
+                if verbose:
+                    print_colored_result(*result)
+        finally:
+            if use_cache and tasks:
+                save_cache(cache)
+            if tasks:
+                save_cache(durations, DURATIONS_FILE)
+
+    if csv_file is not None:
+        print(f"\n\nTests completed. Results saved in {csv_file}, "
+              f"timings saved in {sink.timings_file}")
+        if options.profile_memory:
+            print(f"Memory profile saved in {sink.memory_file}")
+    if options.profile:
+        print(f"CPU profiles saved in {PROFILES_PATH}")
+    if store is not None:
+        print(f"Run {store.run_id} recorded in {store.db_file}")
+
+    not_implemented_tests = sum(len(tests) for tests in skipped.values())
+
+    total_tests = sink.total
+    passed_tests = sink.passed
     failed_tests = total_tests - passed_tests
     success_percentage = (passed_tests * 100) // total_tests if total_tests else 0
 
@@ -139,27 +705,121 @@ def main(selected_tests: Optional[Dict[str, Union[str, List[str]]]] = None,
     print(f"{final_color}Not implemented tests: {not_implemented_tests}")
     print(f"{final_color}Success rate: {success_percentage}%")
 
+    if verbose and sink.phase_totals:
+        print_phase_totals(sink.phase_totals)
+
+
+def parse_examples(parser: argparse.ArgumentParser, examples: List[str]) -> Dict[str, List[str]]:
+    tests: Dict[str, List[str]] = {}
+    for example in examples:
+        operator, _, test_name = example.partition("/")
+        if not operator or not test_name:
+            parser.error(f'expected "Operator/ex_N", got "{example}"')
+        tests.setdefault(operator, []).append(test_name)
+    return tests
+
 
 if __name__ == "__main__":
-    selected_tests: Optional[Dict[str, Union[str, List[str]]]]
-    not_implemented: Optional[Dict[str, Union[str, List[str]]]]
+    parser = argparse.ArgumentParser(description="Run the VTL manual examples, all of them "
+                                                 "unless a selection is given")
+    selection = parser.add_argument_group("selection")
+    selection.add_argument("selectors", nargs="*", metavar="SELECTOR",
+                           help='Examples to run as "Operator" or "Operator/ex_N", both parts '
+                                'accept glob patterns, or a regular expression over '
+                                '"Operator/ex_N" after "re:"')
+    selection.add_argument("--select", action="append", default=[], dest="more_selectors",
+                           metavar="SELECTOR", help="Same as SELECTOR, can be repeated")
+    selection.add_argument("--uses", action="append", metavar="KEYWORD",
+                           help='Only run the examples whose script uses the VTL keyword, e.g. '
+                                '"over", "group by" or "check_hierarchy". Can be repeated to '
+                                'accept any of them')
+    selection.add_argument("--not-implemented", action="append", default=[],
+                           metavar="OPERATOR/EXAMPLE",
+                           help="Report the example as not implemented without running it, "
+                                "can be repeated")
+    data = parser.add_mutually_exclusive_group()
+    data.add_argument("--path", type=Path, default=BASE_PATH,
+                      help="Folder with the examples (default engine_files)")
+    data.add_argument("--scale", type=int, metavar="ROWS",
+                      help="Run the examples scaled to ROWS rows, generating scaled_files/ROWS "
+                           "first when it does not exist (see scale_data.py)")
 
-    # Define specific tests to run. Example: {"Absolute value": ["ex1", "ex2"]}
-    # If it is set to None or {}, all tests will be run
-    selected_tests = {
-        "Subspace": "ex_3"
-    }
-    # Example of usage of specific_tests
-    # selected_tests = {
-    #     "Absolute value": ["ex_1", "ex_2"],
-    #     "Case": "ex_1",
-    # }
-
-    # The tests that are defined in the not_implemented variable will not be run
-    # If it is set to None or {}, all tests will be run
-    not_implemented = {
-    }
+    execution = parser.add_argument_group("execution")
+    execution.add_argument("--jobs", "-j", type=int, default=1,
+                           help="Number of worker processes (0 uses all the available CPUs)")
+    execution.add_argument("--repeat", type=int, default=1,
+                           help="Runs of each passing example, the timings keep the fastest")
+    execution.add_argument("--columnar", action="store_true",
+                           help="Load the CSVs through their Parquet copies (see columnar.py)")
+    execution.add_argument("--compiled", action="store_true",
+                           help="Time the parsing of the scripts apart, the run still "
+                                "includes it (see compiled.py)")
+    execution.add_argument("--structures", action="store_true",
+                           help="Load the structures already formatted and validated "
+                                "(see structures.py)")
+    execution.add_argument("--isolate", action="store_true",
+                           help="Run each example in its own process, implied by the limits")
+    execution.add_argument("--timeout", type=float,
+                           help="Wall-clock seconds after which an example is killed (Timeout)")
+    execution.add_argument("--cpu-limit", type=int,
+                           help="CPU seconds allowed to each example (Timeout), not on Windows")
+    execution.add_argument("--memory-limit", type=int,
+                           help="Address space in MB allowed to each example (MemoryLimit), "
+                                "not on Windows")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--quiet", "-q", action="store_true",
+                        help="Only print the summary, not the result of each example")
+    output.add_argument("--format", choices=["csv", "jsonl"], default="csv",
+                        help="Format of the results of a full run, jsonl also writes "
+                             "test_result.jsonl next to the CSV files (default csv)")
+    output.add_argument("--profile", action="store_true",
+                        help="Save the cProfile statistics of each example in profiles/")
+    output.add_argument("--profile-memory", action="store_true",
+                        help="Record the tracemalloc and RSS peaks of each phase in "
+                             "test_memory.csv, each example runs in its own process")
+    output.add_argument("--no-db", action="store_true",
+                        help="Do not record the run in the results history, see results_db.py")
+
+    cache = parser.add_argument_group("cache")
+    cache.add_argument("--cache", action="store_true",
+                       help="Reuse the previous result of the examples that did not change")
+    cache.add_argument("--clear-cache", action="store_true",
+                       help="Forget the cached results before running")
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.uses:
+        from manifest import VTL_KEYWORDS, normalize_keyword
+        unknown = [keyword for keyword in args.uses
+                   if normalize_keyword(keyword) not in VTL_KEYWORDS]
+        if unknown:
+            parser.error(f"unknown VTL keywords {unknown}, see python manifest.py --tokens")
+
+    base_path = args.path
+    if args.scale is not None:
+        from scale_data import SCALED_PATH, main as scale_examples
+        base_path = SCALED_PATH / str(args.scale)
+        if not base_path.exists():
+            scale_examples([args.scale])
+    if args.selectors or args.more_selectors or args.uses:
+        from manifest import unmatched
+        missing = unmatched(base_path, args.selectors + args.more_selectors, args.uses)
+        if missing:
+            parser.error(f"no example in {base_path} matches {missing}")
+    if args.clear_cache:
+        CACHE_FILE.unlink(missing_ok=True)
 
-    # Pass specific_tests to main() to run only the selected tests, default None
-    # Pass verbose=True to print the results of each test in the console, default False
-    main(selected_tests=selected_tests, not_implemented=not_implemented, verbose=True)
+    main(not_implemented=parse_examples(parser, args.not_implemented),
+         verbose=not args.quiet,
+         jobs=args.jobs,
+         use_cache=args.cache,
+         options=RunOptions(args.columnar, args.profile_memory, args.compiled, args.structures,
+                            args.repeat, args.profile),
+         jsonl=args.format == "jsonl",
+         base_path=base_path,
+         limits=Limits(args.timeout, args.cpu_limit, args.memory_limit, args.isolate),
+         selectors=args.selectors + args.more_selectors,
+         uses=args.uses,
+         record=not args.no_db)
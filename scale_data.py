@@ -0,0 +1,197 @@
+import argparse
+import math
+import shutil
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from run_manual_examples import format_structure, load_json
+
+# Row counts of the scaled datasets, from 10^3 to 10^7
+SCALES = [10 ** exponent for exponent in range(3, 8)]
+
+# Share of null values on the nullable (non identifier) components
+NULL_RATIO = 0.1
+
+# Number of distinct values the measures and attributes are drawn from
+MEASURE_CARDINALITY = 1000
+
+DURATIONS = ["A", "S", "Q", "M", "W", "D"]
+
+BASE_DATE = date(1900, 1, 1)
+# Identifier codes are mapped to calendar days or months, which must stay within year 9999
+MAX_DAYS = (date(9999, 12, 31) - BASE_DATE).days
+MAX_MONTHS = (9999 - BASE_DATE.year) * 12
+
+SCALED_PATH = Path(__file__).parent / "scaled_files"
+
+
+def dataset_seed(seed: int, name: str) -> int:
+    # Stable across processes and machines, unlike hash()
+    return zlib.crc32(f"{seed}:{name}".encode())
+
+
+def type_cardinality(data_type: str) -> Optional[int]:
+    # Maximum number of distinct values of the type, None if unbounded
+    if data_type == "Boolean":
+        return 2
+    if data_type == "Duration":
+        return len(DURATIONS)
+    if data_type in ("Date", "Time"):
+        return MAX_DAYS
+    if data_type == "Time_Period":
+        return MAX_MONTHS
+    return None
+
+
+def identifier_cardinalities(data_types: List[str], rows: int) -> List[int]:
+    # Splits the rows over the identifiers so every row gets a unique identifier combination
+    caps = [type_cardinality(data_type) for data_type in data_types]
+    if not data_types:
+        if rows > 1:
+            raise ValueError("A dataset without identifiers cannot have more than one row")
+        return []
+
+    cardinalities = [1] * len(data_types)
+    remaining = rows
+    # Bounded types are filled first, smallest capacity first
+    unbounded = sum(1 for cap in caps if cap is None)
+    for bound, i in sorted((cap, i) for i, cap in enumerate(caps) if cap is not None):
+        share = math.ceil(remaining ** (1 / (unbounded + 1))) if unbounded else remaining
+        cardinalities[i] = max(1, min(bound, share))
+        remaining = math.ceil(remaining / cardinalities[i])
+    unbounded_indexes = [i for i, cap in enumerate(caps) if cap is None]
+    for position, i in enumerate(unbounded_indexes):
+        share = math.ceil(remaining ** (1 / (len(unbounded_indexes) - position)))
+        cardinalities[i] = max(1, share)
+        remaining = math.ceil(remaining / cardinalities[i])
+
+    if math.prod(cardinalities) < rows:
+        raise ValueError(f"The identifiers {data_types} only allow "
+                         f"{math.prod(cardinalities)} unique combinations, {rows} requested")
+    return cardinalities
+
+
+def type_values(data_type: str, count: int, prefix: str = "") -> np.ndarray:
+    # The first count distinct values of the type, in increasing order
+    codes = np.arange(count)
+    if data_type == "Integer":
+        return codes
+    if data_type == "Number":
+        return codes + 0.5
+    if data_type == "Boolean":
+        return np.array([False, True][:count])
+    if data_type == "Duration":
+        return np.array(DURATIONS[:count])
+    if data_type == "Date":
+        return np.array([(BASE_DATE + timedelta(days=int(code))).isoformat() for code in codes])
+    if data_type == "Time":
+        return np.array([f"{BASE_DATE + timedelta(days=int(code))}/"
+                         f"{BASE_DATE + timedelta(days=int(code) + 1)}" for code in codes])
+    if data_type == "Time_Period":
+        return np.array([f"{BASE_DATE.year + code // 12}M{code % 12 + 1}" for code in codes])
+    return np.array([f"{prefix}{code}" for code in codes], dtype=object)
+
+
+def generate_dataset(data_structure: List[Dict[str, Any]], rows: int,
+                     seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    identifiers = [comp for comp in data_structure if comp["role"] == "Identifier"]
+    cardinalities = identifier_cardinalities([comp["type"] for comp in identifiers], rows)
+
+    # Row i gets the identifier combination i of the mixed-radix space, rows are then shuffled
+    combinations = rng.permutation(rows)
+    columns: Dict[str, Any] = {}
+    stride = 1
+    for comp, cardinality in zip(identifiers, cardinalities):
+        values = type_values(comp["type"], cardinality, prefix=comp["name"] + "_")
+        columns[comp["name"]] = values[(combinations // stride) % cardinality]
+        stride *= cardinality
+
+    columns.update(generate_values(data_structure, rows, rng))
+    return pd.DataFrame(columns, columns=[comp["name"] for comp in data_structure])
+
+
+def generate_values(data_structure: List[Dict[str, Any]], rows: int,
+                    rng: np.random.Generator) -> Dict[str, pd.Series]:
+    # Random columns of the measures and attributes, NULL_RATIO of the nullable ones are null
+    columns = {}
+    for comp in data_structure:
+        if comp["role"] == "Identifier":
+            continue
+        cardinality = type_cardinality(comp["type"]) or MEASURE_CARDINALITY
+        cardinality = min(cardinality, MEASURE_CARDINALITY)
+        values = type_values(comp["type"], cardinality, prefix=comp["name"] + "_")
+        column = pd.Series(values[rng.integers(0, cardinality, size=rows)], dtype=object)
+        if comp["nullable"]:
+            column[rng.random(rows) < NULL_RATIO] = None
+        columns[comp["name"]] = column
+    return columns
+
+
+def build_dataset(data_structure: List[Dict[str, Any]], codes: List[np.ndarray],
+                  rng: np.random.Generator) -> pd.DataFrame:
+    # Dataset whose identifiers are the values of the given codes, in the identifiers order
+    identifiers = [comp for comp in data_structure if comp["role"] == "Identifier"]
+    columns: Dict[str, Any] = {}
+    for comp, comp_codes in zip(identifiers, codes):
+        count = int(comp_codes.max()) + 1
+        cap = type_cardinality(comp["type"])
+        if cap is not None and count > cap:
+            raise ValueError(f"{comp['name']} ({comp['type']}) only has {cap} values, "
+                             f"{count} needed")
+        values = type_values(comp["type"], count, prefix=comp["name"] + "_")
+        columns[comp["name"]] = values[comp_codes]
+    columns.update(generate_values(data_structure, len(codes[0]), rng))
+    return pd.DataFrame(columns, columns=[comp["name"] for comp in data_structure])
+
+
+def generate_example(test_dir: Path, rows: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    input_structure = format_structure(load_json(test_dir / "input.json"))
+    # Only the datasets that have datapoints in the example are generated
+    return {
+        ds["name"]: generate_dataset(ds["DataStructure"], rows, dataset_seed(seed, ds["name"]))
+        for ds in input_structure["datasets"]
+        if (test_dir / f"{ds['name']}.csv").exists()
+    }
+
+
+def write_example(test_dir: Path, output_dir: Path, rows: int, seed: int = 0) -> None:
+    datasets = generate_example(test_dir, rows, seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name in ("input.json", "transformation.vtl"):
+        shutil.copy(test_dir / name, output_dir / name)
+    for name, data in datasets.items():
+        data.to_csv(output_dir / f"{name}.csv", index=False)
+
+
+def main(rows: List[int], seed: int = 0, operators: Optional[List[str]] = None,
+         output_path: Path = SCALED_PATH) -> None:
+    base_path = Path(__file__).parent / "engine_files"
+    for operator_dir in sorted(base_path.iterdir()):
+        if not operator_dir.is_dir() or (operators and operator_dir.name not in operators):
+            continue
+        for test_dir in sorted(operator_dir.iterdir()):
+            for row_count in rows:
+                output_dir = output_path / str(row_count) / operator_dir.name / test_dir.name
+                try:
+                    write_example(test_dir, output_dir, row_count, seed)
+                except ValueError as e:
+                    print(f"Skipping {operator_dir.name}/{test_dir.name} at {row_count} rows: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate scaled datasets for the examples")
+    parser.add_argument("--rows", type=int, nargs="+", default=SCALES,
+                        help="Number of rows of each generated dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--operator", action="append", dest="operators",
+                        help="Operator folder to scale, can be repeated (default all)")
+    parser.add_argument("--output", type=Path, default=SCALED_PATH)
+    args = parser.parse_args()
+
+    main(args.rows, seed=args.seed, operators=args.operators, output_path=args.output)
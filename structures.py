@@ -0,0 +1,105 @@
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from vtlengine.API._InternalApi import load_datasets
+
+from run_manual_examples import format_structure, load_json
+
+STRUCTURES_PATH = Path(__file__).parent / ".structure_cache"
+
+# Structure files of an example, in the order they are returned by load_structures
+STRUCTURE_SOURCES = ["input.json", "output.json"]
+
+
+def structure_file(test_dir: Path) -> Path:
+    # Mirrors the repository layout, examples outside of it are keyed by a hash of their path
+    test_dir = test_dir.resolve()
+    try:
+        relative = test_dir.relative_to(Path(__file__).parent.resolve())
+    except ValueError:
+        relative = Path(hashlib.sha1(str(test_dir).encode()).hexdigest())
+    return STRUCTURES_PATH / relative.parent / f"{relative.name}.json"
+
+
+def source_stamps(test_dir: Path) -> Dict[str, Optional[List[int]]]:
+    stamps: Dict[str, Optional[List[int]]] = {}
+    for name in STRUCTURE_SOURCES:
+        try:
+            stat = (test_dir / name).stat()
+        except FileNotFoundError:
+            stamps[name] = None
+            continue
+        stamps[name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def source_hashes(test_dir: Path) -> Dict[str, Optional[str]]:
+    hashes: Dict[str, Optional[str]] = {}
+    for name in STRUCTURE_SOURCES:
+        source = test_dir / name
+        hashes[name] = hashlib.sha256(source.read_bytes()).hexdigest() if source.exists() else None
+    return hashes
+
+
+def save_structures(test_dir: Path, compiled: Dict[str, Any]) -> None:
+    output_file = structure_file(test_dir)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_suffix(".tmp")
+    with tmp_file.open(mode='w', encoding='utf-8') as f:
+        json.dump(compiled, f)
+    tmp_file.replace(output_file)
+
+
+def compile_structures(test_dir: Path) -> Dict[str, Any]:
+    # Formats the structures of the example and checks that vtlengine accepts them
+    compiled: Dict[str, Any] = {"stamps": source_stamps(test_dir),
+                                "hashes": source_hashes(test_dir)}
+    for name in STRUCTURE_SOURCES:
+        structure = None
+        if compiled["hashes"][name] is not None:
+            structure = format_structure(load_json(test_dir / name))
+            load_datasets(structure)
+        compiled[name] = structure
+    save_structures(test_dir, compiled)
+    return compiled
+
+
+def load_structures(test_dir: Path) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    # Input and reference structures of the example, ready for vtlengine. They are compiled
+    # again when the content of input.json or output.json changed, the files are only hashed
+    # when their modification time or size changed (e.g. after a checkout)
+    try:
+        compiled: Dict[str, Any] = load_json(structure_file(test_dir))
+    except (OSError, ValueError):
+        compiled = {}
+    stamps = source_stamps(test_dir)
+    if compiled.get("stamps") != stamps:
+        if compiled.get("hashes") == source_hashes(test_dir):
+            compiled["stamps"] = stamps
+            save_structures(test_dir, compiled)
+        else:
+            compiled = compile_structures(test_dir)
+    return compiled["input.json"], compiled["output.json"]
+
+
+def main(base_path: Optional[Path] = None) -> None:
+    base_path = base_path or Path(__file__).parent / "engine_files"
+    for script in sorted(base_path.rglob("transformation.vtl")):
+        try:
+            compile_structures(script.parent)
+        except Exception as e:
+            print(f"Skipping {script.parent}: {str(e).replace(chr(10), ' ')}")
+    print(f"Structure files saved in {STRUCTURES_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Format and validate the example structures "
+                                                 "ahead of the runs")
+    parser.add_argument("path", type=Path, nargs="?",
+                        help="Folder with the examples (default engine_files)")
+    args = parser.parse_args()
+
+    main(args.path)
@@ -0,0 +1,252 @@
+import argparse
+import csv
+import math
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+from benchmark import format_optional, measure_run, run_in_process
+from run_manual_examples import BASE_PATH, format_structure, load_json
+from scale_data import DURATIONS, dataset_seed, generate_values, type_values
+
+# Colorama initialization
+init(autoreset=True)
+
+# Examples with the structure of each time identifier type, Me_1 is an Integer in all of them
+TIME_TYPE_EXAMPLES = {
+    "Time_Period": BASE_PATH / "Flow to stock" / "ex_3",
+    "Date": BASE_PATH / "Flow to stock" / "ex_2",
+    "Time": BASE_PATH / "Flow to stock" / "ex_1",
+}
+
+# Scripts of the Fill time series, Time shift, Flow to stock and Stock to flow examples
+TIME_SERIES_SCRIPTS = {
+    "fill_time_series single": "DS_r := fill_time_series ( DS_1, single );",
+    "fill_time_series all": "DS_r := fill_time_series ( DS_1, all );",
+    "timeshift": "DS_r := timeshift ( DS_1 , -1 );",
+    "flow_to_stock": "DS_r := flow_to_stock ( DS_1 );",
+    "stock_to_flow": "DS_r := stock_to_flow ( DS_1 );",
+}
+
+# Weeks and days are numbered 1 to 52 and 1 to 365 in every year, so fill_time_series also
+# adds the W53 and D366 periods of the long years
+PERIODS_PER_YEAR = {"A": 1, "S": 2, "Q": 4, "M": 12, "W": 52, "D": 365}
+MONTHS_PER_PERIOD = {"A": 12, "S": 6, "Q": 3, "M": 1}
+FIRST_YEAR = 2000
+# Monday of the first week of FIRST_YEAR
+FIRST_WEEK = np.datetime64("2000-01-03")
+
+DEFAULT_SERIES = [10, 100]
+DEFAULT_PERIODS = [100, 1000]
+# Share of the periods of each series that are missing
+DEFAULT_GAP_RATIO = 0.1
+# Each series starts up to this share of its periods after the first one, so "all" fills
+# every series over a longer range than its own
+DEFAULT_STAGGER = 0.5
+
+# Timed runs of each case after an untimed one, the fastest one is kept
+TIME_SERIES_REPEATS = 3
+# Cases whose estimated output is above this number of rows are skipped
+MAX_OUTPUT_ROWS = 10 ** 7
+
+TIME_SERIES_BENCHMARK_FILE = Path(__file__).parent / "benchmark_time_series.csv"
+
+
+def period_bounds(frequency: str, indexes: np.ndarray) -> List[np.ndarray]:
+    # First and last day of the periods counted from FIRST_YEAR
+    if frequency in MONTHS_PER_PERIOD:
+        months = MONTHS_PER_PERIOD[frequency]
+        first_month = np.datetime64(f"{FIRST_YEAR}-01", "M")
+        start = (first_month + indexes * months).astype("datetime64[D]")
+        end = (first_month + (indexes + 1) * months).astype("datetime64[D]") - 1
+        return [start, end]
+    if frequency == "W":
+        start = FIRST_WEEK + indexes * 7
+        return [start, start + 6]
+    day = np.datetime64(f"{FIRST_YEAR}-01-01") + indexes
+    return [day, day]
+
+
+def period_values(data_type: str, frequency: str, indexes: np.ndarray) -> np.ndarray:
+    # e.g. 2001Q3 (Time_Period), 2001-09-30 (Date, the end of the period) or
+    # 2001-07-01/2001-09-30 (Time)
+    if data_type == "Time_Period":
+        per_year = PERIODS_PER_YEAR[frequency]
+        years = FIRST_YEAR + indexes // per_year
+        if frequency == "A":
+            return years.astype(str).astype(object)
+        return np.array([f"{year}{frequency}{number}" for year, number
+                         in zip(years, indexes % per_year + 1)], dtype=object)
+    start, end = period_bounds(frequency, indexes)
+    if data_type == "Date":
+        return end.astype(str).astype(object)
+    return np.array([f"{first}/{last}"
+                     for first, last in zip(start.astype(str), end.astype(str))], dtype=object)
+
+
+def time_structure(data_type: str) -> List[Dict[str, Any]]:
+    data_structure: List[Dict[str, Any]] = format_structure(
+        load_json(TIME_TYPE_EXAMPLES[data_type] / "input.json"))["datasets"][0]["DataStructure"]
+    return data_structure
+
+
+def generate_series(data_structure: List[Dict[str, Any]], series: int, periods: int,
+                    frequencies: List[str], gap_ratio: float = DEFAULT_GAP_RATIO,
+                    stagger: float = DEFAULT_STAGGER, seed: int = 0) -> pd.DataFrame:
+    # series values of Id_1 with periods consecutive periods of Id_2 each, gap_ratio of them
+    # dropped. With several frequencies, series i has frequencies[i % len(frequencies)]
+    rng = np.random.default_rng(dataset_seed(seed, "DS_1"))
+    time_identifier = next(comp for comp in data_structure
+                           if comp["role"] == "Identifier" and comp["name"] != "Id_1")
+    starts = rng.integers(0, int(stagger * periods) + 1, size=series)
+    series_codes = np.repeat(np.arange(series), periods)
+    indexes = starts[series_codes] + np.tile(np.arange(periods), series)
+    kept = rng.random(len(indexes)) >= gap_ratio
+    series_codes, indexes = series_codes[kept], indexes[kept]
+
+    time_values = np.empty(len(indexes), dtype=object)
+    series_frequencies = np.array(frequencies)[series_codes % len(frequencies)]
+    for frequency in frequencies:
+        selected = series_frequencies == frequency
+        time_values[selected] = period_values(time_identifier["type"], frequency,
+                                              indexes[selected])
+
+    columns: Dict[str, Any] = {
+        "Id_1": type_values("String", series, prefix="Id_1_")[series_codes],
+        time_identifier["name"]: time_values,
+    }
+    columns.update(generate_values(data_structure, len(indexes), rng))
+    data = pd.DataFrame(columns, columns=[comp["name"] for comp in data_structure])
+    # The engine gets the rows unordered
+    return data.iloc[rng.permutation(len(data))].reset_index(drop=True)
+
+
+def output_rows_estimate(operator: str, frequencies: List[str], series: int, periods: int,
+                         stagger: float) -> int:
+    # fill_time_series all fills every series with the periods of its frequency over the years
+    # of the whole dataset, with mixed frequencies the daily series span the years of the
+    # annual ones. The other operators return at most the periods of each series
+    if operator != "fill_time_series all":
+        return series * periods
+    span = int(stagger * periods) + periods
+    years = max(math.ceil(span / PERIODS_PER_YEAR[frequency]) for frequency in frequencies) + 1
+    return years * sum(PERIODS_PER_YEAR[frequencies[i % len(frequencies)]]
+                       for i in range(series))
+
+
+def run_case(script: str, data_structure: List[Dict[str, Any]], data: pd.DataFrame,
+             repeats: int) -> Dict[str, Any]:
+    # Fastest of repeats runs after an untimed one, in the process of run_in_process
+    datapoints: Dict[str, Union[pd.DataFrame, str, Path]] = {"DS_1": data}
+    data_structures = {"datasets": [{"name": "DS_1", "DataStructure": data_structure}]}
+    try:
+        measure_run(script, data_structures, datapoints)
+        runs = [measure_run(script, data_structures, datapoints) for _ in range(repeats)]
+    except Exception as e:
+        return {"error": str(e).replace('\n', ' ')}
+    fastest: Dict[str, Any] = min(runs, key=lambda run: run["seconds"])
+    return fastest
+
+
+def main(data_types: Optional[List[str]] = None, frequencies: Optional[List[str]] = None,
+         series_counts: Optional[List[int]] = None, period_counts: Optional[List[int]] = None,
+         gap_ratio: float = DEFAULT_GAP_RATIO, stagger: float = DEFAULT_STAGGER,
+         operators: Optional[List[str]] = None, mixed: bool = True, seed: int = 0,
+         repeats: int = TIME_SERIES_REPEATS, max_output_rows: int = MAX_OUTPUT_ROWS,
+         csv_file: Path = TIME_SERIES_BENCHMARK_FILE) -> None:
+    frequencies = frequencies or DURATIONS
+    # Only time periods carry their frequency, the dates and intervals of one dataset have one
+    frequency_sets = {
+        data_type: [[frequency] for frequency in frequencies]
+        + ([frequencies] if mixed and data_type == "Time_Period" and len(frequencies) > 1
+           else [])
+        for data_type in data_types or list(TIME_TYPE_EXAMPLES)
+    }
+    report = []
+
+    for data_type, type_frequencies in frequency_sets.items():
+        data_structure = time_structure(data_type)
+        for frequency_set, series, periods in product(type_frequencies,
+                                                      series_counts or DEFAULT_SERIES,
+                                                      period_counts or DEFAULT_PERIODS):
+            frequency = "+".join(frequency_set)
+            data = generate_series(data_structure, series, periods, frequency_set, gap_ratio,
+                                   stagger, seed)
+            print(f"\n{data_type} {frequency}, {series} series of {periods} periods, "
+                  f"{len(data)} rows:")
+            for operator in operators or TIME_SERIES_SCRIPTS:
+                case = [operator, data_type, frequency, series, periods, gap_ratio, len(data)]
+                estimate = output_rows_estimate(operator, frequency_set, series, periods,
+                                                stagger)
+                if estimate > max_output_rows:
+                    report.append(case + ["", "", "", "", "",
+                                          f"Skipped, about {estimate} output rows"])
+                    print(f"{Fore.YELLOW}  {operator}: skipped, about {estimate} output rows")
+                    continue
+                result = run_in_process(run_case, TIME_SERIES_SCRIPTS[operator],
+                                        data_structure, data, repeats)
+                error = result.get("error", "")
+                if error:
+                    report.append(case + ["", "", "", "", "", error])
+                    print(f"{Fore.YELLOW}  {operator}: {error}")
+                    continue
+                seconds = result["seconds"]
+                output_rows = result["output_rows"]["DS_r"]
+                expansion = output_rows / len(data) if len(data) else 0.0
+                report.append(case + [output_rows, f"{expansion:.3f}", f"{seconds:.6f}",
+                                      f"{len(data) / seconds:.0f}",
+                                      format_optional(result.get("peak_rss_mb"), 1), ""])
+                print(f"{Fore.GREEN}  {operator}: {seconds:.3f}s, "
+                      f"{len(data) / seconds:,.0f} rows/s, {output_rows} output rows "
+                      f"(x{expansion:.2f}), peak RSS "
+                      f"{format_optional(result.get('peak_rss_mb'), 0)}MB")
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Operator", "Time type", "Frequency", "Series", "Periods",
+                         "Gap ratio", "Input rows", "Output rows", "Expansion", "Seconds",
+                         "Rows per second", "Peak RSS MB", "Error"])
+        writer.writerows(report)
+    print(f"\n\nBenchmark completed. Results saved in {csv_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the time series operators over "
+                                                 "generated series with gaps")
+    parser.add_argument("--type", action="append", dest="data_types",
+                        choices=list(TIME_TYPE_EXAMPLES),
+                        help="Type of the time identifier, can be repeated (default all)")
+    parser.add_argument("--frequency", nargs="+", choices=DURATIONS, default=DURATIONS,
+                        help="Frequencies of the series (default all)")
+    parser.add_argument("--no-mixed", action="store_true",
+                        help="Do not benchmark the time periods with all the frequencies mixed")
+    parser.add_argument("--series", type=int, nargs="+", default=DEFAULT_SERIES,
+                        help="Numbers of series")
+    parser.add_argument("--periods", type=int, nargs="+", default=DEFAULT_PERIODS,
+                        help="Periods of each series")
+    parser.add_argument("--gap-ratio", type=float, default=DEFAULT_GAP_RATIO,
+                        help="Share of the periods missing from each series")
+    parser.add_argument("--stagger", type=float, default=DEFAULT_STAGGER,
+                        help="Latest start of a series, as a share of its periods")
+    parser.add_argument("--operator", action="append", dest="operators",
+                        choices=list(TIME_SERIES_SCRIPTS),
+                        help="Operator to benchmark, can be repeated (default all)")
+    parser.add_argument("--repeat", type=int, default=TIME_SERIES_REPEATS,
+                        help="Timed runs of each case, the fastest one is kept")
+    parser.add_argument("--max-output-rows", type=int, default=MAX_OUTPUT_ROWS,
+                        help="Largest estimated output of a case to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=TIME_SERIES_BENCHMARK_FILE)
+    args = parser.parse_args()
+    if not 0 <= args.gap_ratio < 1:
+        parser.error("--gap-ratio must be at least 0 and below 1")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    main(args.data_types, args.frequency, args.series, args.periods, args.gap_ratio,
+         args.stagger, args.operators, not args.no_mixed, args.seed, args.repeat,
+         args.max_output_rows, args.output)
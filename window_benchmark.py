@@ -0,0 +1,197 @@
+import argparse
+import csv
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+from benchmark import measure_run
+from run_manual_examples import BASE_PATH, format_structure, load_json
+from scale_data import build_dataset, dataset_seed
+
+# Colorama initialization
+init(autoreset=True)
+
+# Lag/ex_1 has the layout of the analytic examples: Id_1 and Id_2 partition, Id_3 orders
+STRUCTURE_EXAMPLE = BASE_PATH / "Lag" / "ex_1"
+
+# Scripts of the analytic examples, {frame} is replaced by the windowing clause. The operators
+# without it only run without a frame
+ANALYTIC_SCRIPTS = {
+    "sum": "DS_r := sum ( DS_1 over ( partition by Id_1, Id_2 order by Id_3 {frame} ) );",
+    "avg": "DS_r := avg ( DS_1 over ( partition by Id_1, Id_2 order by Id_3 {frame} ) );",
+    "max": "DS_r := max ( DS_1 over ( partition by Id_1, Id_2 order by Id_3 {frame} ) );",
+    "first_value": "DS_r := first_value ( DS_1 over ( partition by Id_1, Id_2 order by Id_3 "
+                   "{frame} ) );",
+    "last_value": "DS_r := last_value ( DS_1 over ( partition by Id_1, Id_2 order by Id_3 "
+                  "{frame} ) );",
+    "rank": "DS_r := DS_1 [ calc Me_2 := rank ( over ( partition by Id_1 , Id_2 "
+            "order by Me_1 ) ) ];",
+    "lag": "DS_r := lag ( DS_1 , 1 over ( partition by Id_1 , Id_2 order by Id_3 ) );",
+    "lead": "DS_r := lead ( DS_1 , 1 over ( partition by Id_1 , Id_2 order by Id_3 ) );",
+    "ratio_to_report": "DS_r := ratio_to_report ( DS_1 over ( partition by Id_1, Id_2 ) );",
+}
+
+# Loading and validating DS_1 is most of a run, the width exponents use the time above this
+BASELINE_SCRIPT = "DS_r := DS_1;"
+
+DEFAULT_PARTITIONS = [10, 1000]
+DEFAULT_PARTITION_SIZES = [100, 1000]
+# Data points (or Id_3 values) on each side of the bounded frames
+DEFAULT_WIDTHS = [1, 10, 100]
+
+FRAME_MODES = ["data points", "range"]
+# Bounded frames whose time grows with the width faster than this exponent recompute each
+# window instead of sliding it
+WIDTH_EXPONENT = 0.5
+
+# Timed runs of each script, the fastest one is kept
+WINDOW_REPEATS = 3
+
+WINDOW_BENCHMARK_FILE = Path(__file__).parent / "benchmark_windows.csv"
+
+
+def frame_shapes(widths: List[int]) -> Dict[str, str]:
+    # Name -> windowing clause, e.g. "range 10" -> "range between 10 preceding and 10 following"
+    shapes = {"none": ""}
+    for mode in FRAME_MODES:
+        for width in widths:
+            shapes[f"{mode} {width}"] = f"{mode} between {width} preceding and {width} following"
+        shapes[f"{mode} unbounded"] = f"{mode} between unbounded preceding and current data point"
+    return shapes
+
+
+def window_structure() -> List[Dict[str, Any]]:
+    # Id_3 is an Integer instead of a time period, range frames need a numeric order and the
+    # range frames then cover the same data points as the data points ones
+    data_structure: List[Dict[str, Any]] = format_structure(
+        load_json(STRUCTURE_EXAMPLE / "input.json"))["datasets"][0]["DataStructure"]
+    return [{**comp, "type": "Integer"} if comp["name"] == "Id_3" else comp
+            for comp in data_structure]
+
+
+def generate_partitions(data_structure: List[Dict[str, Any]], partitions: int, size: int,
+                        seed: int = 0) -> pd.DataFrame:
+    # partitions values of Id_1 with size consecutive Id_3 values each, Id_2 has one value.
+    # The rows are shuffled, so the engine has to sort them
+    rng = np.random.default_rng(dataset_seed(seed, "DS_1"))
+    order = rng.permutation(partitions * size)
+    codes = {"Id_1": order // size, "Id_2": np.zeros_like(order), "Id_3": order % size}
+    identifiers = [comp["name"] for comp in data_structure if comp["role"] == "Identifier"]
+    return build_dataset(data_structure, [codes[name] for name in identifiers], rng)
+
+
+def width_exponent(seconds: Dict[str, float], name: str, widths: List[int],
+                   baseline: float) -> Optional[float]:
+    # Log-log slope of the time above the baseline over the frame size (2 * width + 1) of the
+    # bounded frames
+    points = [(2 * width + 1, max(seconds[f"{name} {width}"] - baseline, 1e-6))
+              for width in widths if f"{name} {width}" in seconds]
+    if len(points) < 2:
+        return None
+    sizes, times = zip(*points)
+    return float(np.polyfit(np.log(sizes), np.log(times), 1)[0])
+
+
+def time_script(script: str, data_structure: List[Dict[str, Any]], data: pd.DataFrame,
+                repeats: int = WINDOW_REPEATS) -> float:
+    # Fastest of repeats runs after an untimed one, the differences fitted by width_exponent
+    # are of the order of the run to run noise
+    datapoints: Dict[str, Union[pd.DataFrame, str, Path]] = {"DS_1": data}
+    data_structures = {"datasets": [{"name": "DS_1", "DataStructure": data_structure}]}
+    measure_run(script, data_structures, datapoints)
+    return min(float(measure_run(script, data_structures, datapoints)["seconds"])
+               for _ in range(repeats))
+
+
+def benchmark_operator(operator: str, shapes: Dict[str, str],
+                       data_structure: List[Dict[str, Any]], data: pd.DataFrame,
+                       repeats: int = WINDOW_REPEATS
+                       ) -> Tuple[Dict[str, float], Dict[str, str]]:
+    # Seconds and errors of the operator per frame shape
+    script = ANALYTIC_SCRIPTS[operator]
+    if "{frame}" not in script:
+        shapes = {"none": ""}
+    seconds = {}
+    errors = {}
+    for shape, frame in shapes.items():
+        try:
+            seconds[shape] = time_script(script.format(frame=frame), data_structure, data,
+                                         repeats)
+        except Exception as e:
+            errors[shape] = str(e).replace('\n', ' ')
+    return seconds, errors
+
+
+def main(operators: Optional[List[str]] = None, partitions: Optional[List[int]] = None,
+         sizes: Optional[List[int]] = None, widths: Optional[List[int]] = None, seed: int = 0,
+         repeats: int = WINDOW_REPEATS, csv_file: Path = WINDOW_BENCHMARK_FILE) -> None:
+    widths = sorted(widths or DEFAULT_WIDTHS)
+    shapes = frame_shapes(widths)
+    data_structure = window_structure()
+    report = []
+
+    for partition_count, size in product(partitions or DEFAULT_PARTITIONS,
+                                         sizes or DEFAULT_PARTITION_SIZES):
+        data = generate_partitions(data_structure, partition_count, size, seed)
+        baseline = time_script(BASELINE_SCRIPT, data_structure, data, repeats)
+        print(f"\n{partition_count} partitions of {size} rows, baseline {baseline * 1000:.1f}ms:")
+        for operator in operators or ANALYTIC_SCRIPTS:
+            seconds, errors = benchmark_operator(operator, shapes, data_structure, data,
+                                                 repeats)
+            exponents = {name: width_exponent(seconds, name, widths, baseline)
+                         for name in FRAME_MODES}
+            recomputed = [name for name, exponent in exponents.items()
+                          if exponent is not None and exponent > WIDTH_EXPONENT]
+            report.append(
+                [operator, partition_count, size, len(data), f"{baseline:.6f}"]
+                + [f"{seconds[shape]:.6f}" if shape in seconds else "" for shape in shapes]
+                + [f"{exponent:.3f}" if exponent is not None else ""
+                   for exponent in exponents.values()]
+                + [" ".join(recomputed),
+                   "; ".join(f"{shape}: {error}" for shape, error in errors.items())])
+
+            color = Fore.RED if recomputed else Fore.YELLOW if errors else Fore.GREEN
+            timings = ", ".join(f"{shape} {seconds[shape] * 1000:.1f}ms" for shape in seconds)
+            print(f"{color}  {operator}: {timings}")
+            for name in recomputed:
+                print(f"{Fore.RED}    {name} frames grow with the width "
+                      f"(exponent {exponents[name]:.2f}), windows are not slid")
+            for shape, error in errors.items():
+                print(f"{Fore.YELLOW}    {shape}: {error}")
+
+    with csv_file.open(mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Operator", "Partitions", "Partition size", "Rows", "Baseline_s"]
+                        + [f"{shape}_s" for shape in shapes]
+                        + [f"{name} width exponent" for name in FRAME_MODES]
+                        + ["Recomputed windows", "Errors"])
+        writer.writerows(report)
+    print(f"\n\nBenchmark completed. Results saved in {csv_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analytic operators per "
+                                                 "partition and window frame shape")
+    parser.add_argument("--operator", action="append", dest="operators",
+                        choices=list(ANALYTIC_SCRIPTS),
+                        help="Analytic operator to benchmark, can be repeated (default all)")
+    parser.add_argument("--partitions", type=int, nargs="+", default=DEFAULT_PARTITIONS,
+                        help="Numbers of partitions")
+    parser.add_argument("--partition-size", type=int, nargs="+", default=DEFAULT_PARTITION_SIZES,
+                        help="Rows of each partition")
+    parser.add_argument("--width", type=int, nargs="+", default=DEFAULT_WIDTHS,
+                        help="Data points on each side of the bounded frames")
+    parser.add_argument("--repeat", type=int, default=WINDOW_REPEATS,
+                        help="Timed runs of each script, the fastest one is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=WINDOW_BENCHMARK_FILE)
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    main(args.operators, args.partitions, args.partition_size, args.width, args.seed,
+         args.repeat, args.output)
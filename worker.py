@@ -0,0 +1,167 @@
+import argparse
+import os
+import secrets
+import socket
+import stat
+import sys
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, List, Tuple
+
+from colorama import Fore, init
+
+# Colorama initialization
+init(autoreset=True)
+
+# The client only depends on the standard library and colorama, pandas and vtlengine are
+# imported once by the worker, so submitting an example does not pay their import cost
+
+# The socket and the authkey live in a directory only readable by the user: the requests and
+# results are pickled, so whoever can reach the worker, or pose as it, runs code on the other side
+if os.environ.get("XDG_RUNTIME_DIR"):
+    RUNTIME_PATH = Path(os.environ["XDG_RUNTIME_DIR"]) / "vtl_manual_examples"
+else:
+    RUNTIME_PATH = Path.home() / ".vtl_manual_examples"
+if sys.platform == "win32":
+    DEFAULT_ADDRESS = r"\\.\pipe\vtl_manual_examples"
+else:
+    DEFAULT_ADDRESS = str(RUNTIME_PATH / "worker.sock")
+
+BASE_PATH = Path(__file__).parent / "engine_files"
+
+# Example run once at startup to warm up the parser and the engine caches
+WARMUP_EXAMPLE = "Absolute value/ex_1"
+
+
+def resolve_example(example: str) -> Tuple[Path, str]:
+    # Accepts "Operator/ex_N" relative to engine_files or a path to an example folder
+    test_dir = Path(example)
+    if not test_dir.is_absolute():
+        test_dir = BASE_PATH / example
+    return test_dir, test_dir.parent.name
+
+
+def authkey_file(address: str) -> Path:
+    # Random key written by serve, one per address so several workers can run side by side
+    return RUNTIME_PATH / f"{Path(address).name}.key"
+
+
+def write_authkey(address: str) -> bytes:
+    RUNTIME_PATH.mkdir(mode=0o700, parents=True, exist_ok=True)
+    RUNTIME_PATH.chmod(0o700)
+    authkey = secrets.token_bytes(32)
+    key_file = authkey_file(address)
+    key_file.unlink(missing_ok=True)
+    fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    return authkey
+
+
+def remove_stale_socket(address: str) -> None:
+    # The socket file of a worker that was killed stays behind and makes the bind fail. It is
+    # removed when nothing answers on it, a live worker is left alone
+    path = Path(address)
+    if sys.platform == "win32" or not path.exists():
+        return
+    if not stat.S_ISSOCK(path.stat().st_mode):
+        raise FileExistsError(f"{address} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(address)
+        except ConnectionRefusedError:
+            path.unlink()
+            return
+    raise FileExistsError(f"A worker is already listening on {address}")
+
+
+def serve(address: str = DEFAULT_ADDRESS) -> None:
+    from run_manual_examples import run_test
+
+    remove_stale_socket(address)
+    start = time.perf_counter()
+    run_test(*resolve_example(WARMUP_EXAMPLE))
+
+    authkey = write_authkey(address)
+    try:
+        with Listener(address, authkey=authkey) as listener:
+            print(f"Worker ready in {time.perf_counter() - start:.2f}s, listening on {address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, EOFError, ConnectionError):
+                    # Clients without the authkey or that disconnect during the handshake
+                    continue
+                with connection:
+                    try:
+                        request = connection.recv()
+                        try:
+                            if request["command"] == "stop":
+                                connection.send([])
+                                break
+                            results = [run_test(*resolve_example(example))
+                                       for example in request["examples"]]
+                        except (KeyError, TypeError) as e:
+                            connection.send({"error": f"Malformed request: {e!r}"})
+                            continue
+                        connection.send(results)
+                    except (EOFError, ConnectionError):
+                        # A client that disconnects early must not take the worker down
+                        continue
+    finally:
+        authkey_file(address).unlink(missing_ok=True)
+
+
+def connect(address: str) -> Connection:
+    # Raises ConnectionError when no worker is running on the address
+    try:
+        authkey = authkey_file(address).read_bytes()
+        return Client(address, authkey=authkey)
+    except (FileNotFoundError, ConnectionRefusedError, AuthenticationError) as e:
+        raise ConnectionError(f"No worker running on {address}, start one with "
+                              f"\"python worker.py serve\"") from e
+
+
+def submit(examples: List[str], address: str = DEFAULT_ADDRESS) -> List[Any]:
+    with connect(address) as connection:
+        connection.send({"command": "run", "examples": examples})
+        results = connection.recv()
+    if isinstance(results, dict):
+        raise ValueError(results["error"])
+    return list(results)
+
+
+def stop(address: str = DEFAULT_ADDRESS) -> None:
+    with connect(address) as connection:
+        connection.send({"command": "stop"})
+        connection.recv()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm worker to run examples without the "
+                                                 "import cost of vtlengine")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("serve", help="Start the worker")
+    subparsers.add_parser("stop", help="Stop the worker")
+    run_parser = subparsers.add_parser("run", help="Run examples on the worker")
+    run_parser.add_argument("examples", nargs="+", help='Examples as "Operator/ex_N"')
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            serve(args.address)
+        elif args.command == "stop":
+            stop(args.address)
+        else:
+            start = time.perf_counter()
+            for operator, example, result, error in submit(args.examples, args.address):
+                color = Fore.GREEN if result == "Ok" else Fore.RED
+                print(f"{color}Operator: {operator}, Example: {example}, Result: {result}, "
+                      f"Error: {error}")
+            print(f"\nCompleted in {time.perf_counter() - start:.3f}s")
+    except (ConnectionError, FileExistsError) as e:
+        print(f"{Fore.RED}{e}")
+        sys.exit(1)